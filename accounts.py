@@ -0,0 +1,157 @@
+import glob
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from analytics import LedgerAnalytics
+from execution import PositionBook
+from ledger import Ledger
+
+# One directory per account holding that account's portfolio database and transaction ledger
+ACCOUNTS_DIR = os.environ.get("ACCOUNTS_DIR", "accounts")
+DEFAULT_ACCOUNT = "default"
+
+# Accounts kept loaded in memory at once, and how long an unused one stays loaded
+MAX_OPEN_ACCOUNTS = 256
+ACCOUNT_IDLE_TIMEOUT = 15 * 60  # seconds
+
+_ACCOUNT_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def is_valid_account_id(account_id):
+    return bool(_ACCOUNT_ID.fullmatch(account_id or ""))
+
+
+# Path of a file inside an account's directory, creating the directory on first use
+def account_path(account_id, filename, directory=ACCOUNTS_DIR):
+    if not is_valid_account_id(account_id):
+        raise ValueError(f"Invalid account id: {account_id!r}")
+    account_dir = os.path.join(directory, account_id)
+    os.makedirs(account_dir, exist_ok=True)
+    return os.path.join(account_dir, filename)
+
+
+def migrate_legacy(path, legacy_path):
+    """Move a pre-accounts file and its sidecars (checkpoints, SQLite -wal/-shm) next to path, once."""
+    if os.path.exists(path) or not os.path.exists(legacy_path):
+        return False
+    stem = os.path.splitext(legacy_path)[0]
+    sidecars = glob.glob(glob.escape(legacy_path) + "-*") + glob.glob(glob.escape(stem) + ".*.json")
+    for name in [legacy_path] + sidecars:
+        os.replace(name, os.path.join(os.path.dirname(path), os.path.basename(name)))
+    return True
+
+
+# Loaded per-account state, kept LRU; entries idle for longer than idle_timeout are dropped
+# and simply loaded again from disk the next time the account is used. An evicted entry that some
+# session still holds is handed back instead, so one account never has two live copies.
+class AccountRegistry:
+    def __init__(self, load, max_open=MAX_OPEN_ACCOUNTS, idle_timeout=ACCOUNT_IDLE_TIMEOUT):
+        self.load = load
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout
+        self._entries = OrderedDict()  # account id -> (last used, value), least recently used first
+        self._loading = {}  # account id -> Future shared by every session waiting on that account
+        self._evicted = weakref.WeakValueDictionary()  # evicted entries that are still referenced elsewhere
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def _evict(self, now):
+        # Oldest first, so this stops at the first entry that is still in use
+        while self._entries:
+            account_id, (last_used, _) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_open and now - last_used < self.idle_timeout:
+                break
+            self._evicted[account_id] = self._entries.pop(account_id)[1]
+            self.evictions += 1
+
+    def get(self, account_id):
+        """Return the account's state, loading it if it is not in memory; one load per account at a time."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(account_id)
+            if entry is not None:
+                self._entries[account_id] = (now, entry[1])
+                self._entries.move_to_end(account_id)
+                self._evict(now)
+                return entry[1]
+            value = self._evicted.pop(account_id, None)
+            if value is not None:
+                self._entries[account_id] = (now, value)
+                self._evict(now)
+                return value
+            future = self._loading.get(account_id)
+            leader = future is None
+            if leader:
+                future = self._loading[account_id] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = self.load(account_id)
+        except Exception as e:
+            with self._lock:
+                del self._loading[account_id]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._entries[account_id] = (time.monotonic(), value)
+            self._evict(time.monotonic())
+            del self._loading[account_id]
+            self.loads += 1
+        future.set_result(value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {"open": len(self._entries), "loads": self.loads, "evictions": self.evictions}
+
+
+# One account's transaction ledger and the state derived from it, shared by every session on
+# that account; callers hold lock while recording trades so two sessions cannot interleave
+class LedgerAccount:
+    def __init__(self, path, fee_model, history_rows=1000):
+        self.path = path
+        self.fee_model = fee_model
+        self.history_rows = history_rows
+        self.lock = threading.RLock()
+        self.ledger = None
+        self.book = None
+        self.transactions = []  # the most recent history_rows ledger rows, for display
+        self._analytics = {}  # cost method -> LedgerAnalytics
+
+    def load(self, initial_cash=None):
+        """Restore cash and holdings from the ledger checkpoint, replaying only newer rows."""
+        with self.lock:
+            self.ledger = Ledger(self.path).load()
+            self._derive(self.ledger.cash if self.ledger.cash is not None else initial_cash)
+        return self
+
+    def refresh(self):
+        """Rebuild the book and recent history after rows were appended through self.ledger directly."""
+        with self.lock:
+            self._derive(self.ledger.cash)
+
+    def _derive(self, cash):
+        # cash stays None for a new account until its initial fund is set
+        self.book = PositionBook.from_holdings(cash, self.ledger.holdings, self.fee_model)
+        self.transactions = self.ledger.tail(self.history_rows).to_dict("records")
+
+    def record(self, transaction):
+        with self.lock:
+            self.transactions.append(transaction)
+            del self.transactions[:-self.history_rows]
+            self.ledger.append(transaction)
+
+    def analytics(self, method):
+        """Running P&L for a cost method, caught up with any rows appended since it was last used."""
+        with self.lock:
+            if method not in self._analytics:
+                self._analytics[method] = LedgerAnalytics(self.path, method).load()
+            return self._analytics[method].update()
@@ -0,0 +1,276 @@
+import json
+import os
+from collections import deque
+
+import pandas as pd
+
+from execution import BUY
+from ledger import CHECKPOINT_EVERY, REPLAY_CHUNK_SIZE
+
+FIFO = "FIFO"
+AVERAGE_COST = "Average cost"
+COST_METHODS = [FIFO, AVERAGE_COST]
+
+SUMMARY_COLUMNS = [
+    "Symbol",
+    "Shares",
+    "Average Cost",
+    "Cost Basis",
+    "Last Price",
+    "Market Value",
+    "Unrealized P&L",
+    "Realized P&L",
+    "Fees",
+]
+
+
+class Holding:
+    __slots__ = ("shares", "cost", "lots", "realized", "fees", "last_price")
+
+    def __init__(self, shares=0, cost=0.0, lots=None, realized=0.0, fees=0.0, last_price=0.0):
+        self.shares = shares
+        self.cost = cost  # cost basis of the shares held, buy fees included
+        self.lots = deque(lots or [])  # [shares, cost per share] in purchase order, FIFO only
+        self.realized = realized
+        self.fees = fees
+        self.last_price = last_price
+
+
+# Running P&L over a stream of trades: each trade and each price update is O(1) (FIFO lots amortized)
+class PnLTracker:
+    def __init__(self, cash=0.0, method=FIFO):
+        if method not in COST_METHODS:
+            raise ValueError(f"Unknown cost method: {method}")
+        self.method = method
+        self.cash = cash
+        self.holdings = {}
+        self.realized = 0.0
+        self.fees = 0.0
+        self.cost = 0.0  # cost basis of everything held
+        self.market_value = 0.0  # shares times last known price, summed over holdings
+        self.starting_value = cash  # the initial fund; the ledger records no deposits or withdrawals after it
+        self.trades = 0
+
+    @property
+    def value(self):
+        return self.cash + self.market_value
+
+    @property
+    def unrealized(self):
+        return self.market_value - self.cost
+
+    @property
+    def total_return(self):
+        return self.value / self.starting_value - 1 if self.starting_value > 0 else 0.0
+
+    def _holding(self, symbol):
+        holding = self.holdings.get(symbol)
+        if holding is None:
+            holding = self.holdings[symbol] = Holding()
+        return holding
+
+    def mark(self, symbol, price):
+        """Revalue a symbol at a new price."""
+        holding = self._holding(symbol)
+        self.market_value += holding.shares * (price - holding.last_price)
+        holding.last_price = price
+
+    def apply(self, side, symbol, shares, price, fee):
+        """Fold one trade into the running state; returns the P&L it realized (0 for buys).
+
+        Raises ValueError, leaving the state untouched, for a sell of more shares than are held.
+        """
+        held = self.holdings[symbol].shares if symbol in self.holdings else 0
+        if side != BUY and shares > held:
+            raise ValueError(f"Cannot sell {shares} shares of {symbol}; only {held} held")
+        self.mark(symbol, price)
+        holding = self.holdings[symbol]
+        notional = shares * price
+        holding.fees += fee
+        self.fees += fee
+        self.trades += 1
+
+        if side == BUY:
+            cost = notional + fee
+            holding.shares += shares
+            holding.cost += cost
+            if self.method == FIFO:
+                holding.lots.append([shares, cost / shares])
+            self.cash -= cost
+            self.cost += cost
+            self.market_value += notional
+            return 0.0
+
+        if self.method == FIFO:
+            removed = 0.0
+            remaining = shares
+            while remaining > 0:
+                lot = holding.lots[0]
+                used = min(lot[0], remaining)
+                removed += used * lot[1]
+                lot[0] -= used
+                remaining -= used
+                if lot[0] == 0:
+                    holding.lots.popleft()
+        else:
+            removed = holding.cost * shares / holding.shares
+        realized = notional - fee - removed
+
+        holding.shares -= shares
+        holding.cost = holding.cost - removed if holding.shares else 0.0
+        holding.realized += realized
+        self.realized += realized
+        self.cash += notional - fee
+        self.cost -= removed
+        self.market_value -= notional
+        return realized
+
+    def totals(self):
+        return {
+            "cash": self.cash,
+            "market_value": self.market_value,
+            "value": self.value,
+            "cost_basis": self.cost,
+            "unrealized": self.unrealized,
+            "realized": self.realized,
+            "fees": self.fees,
+            "total_return": self.total_return,
+            "trades": self.trades,
+        }
+
+    def summary(self):
+        """One row per symbol ever traded, with open and closed P&L."""
+        rows = []
+        for symbol, h in self.holdings.items():
+            market_value = h.shares * h.last_price
+            rows.append((
+                symbol,
+                h.shares,
+                h.cost / h.shares if h.shares else 0.0,
+                h.cost,
+                h.last_price,
+                market_value,
+                market_value - h.cost,
+                h.realized,
+                h.fees,
+            ))
+        return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+
+    def to_dict(self):
+        state = {name: getattr(self, name) for name in (
+            "method", "cash", "realized", "fees", "cost", "market_value", "starting_value", "trades"
+        )}
+        state["holdings"] = {
+            symbol: [h.shares, h.cost, list(h.lots), h.realized, h.fees, h.last_price]
+            for symbol, h in self.holdings.items()
+        }
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        tracker = cls(state["cash"], state["method"])
+        for name in ("realized", "fees", "cost", "market_value", "starting_value", "trades"):
+            setattr(tracker, name, state[name])
+        tracker.holdings = {symbol: Holding(*values) for symbol, values in state["holdings"].items()}
+        return tracker
+
+
+# PnLTracker fed from the transaction ledger CSV, resuming from the byte offset it last reached
+class LedgerAnalytics:
+    COLUMNS = ["Type", "Stock Symbol", "Shares", "Price per Share", "Transaction Fee", "Total Amount", "Available Cash"]
+
+    def __init__(self, path, method=FIFO, state_path=None, checkpoint_every=CHECKPOINT_EVERY):
+        self.path = path
+        self.method = method
+        suffix = method.lower().replace(" ", "_")
+        self.state_path = state_path or f"{os.path.splitext(path)[0]}.analytics.{suffix}.json"
+        self.checkpoint_every = checkpoint_every
+        self._reset()
+
+    def _reset(self):
+        self.tracker = None  # created from the first row, which tells us the starting cash
+        self.offset = 0
+        self.header = None
+        self.skipped = []  # messages for ledger rows that could not be applied, e.g. sells of shares never bought
+        self._rows_since_checkpoint = 0
+
+    def _read_state(self):
+        if not os.path.exists(self.state_path) or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Same validity checks as the ledger checkpoint: the CSV must not have shrunk or changed header
+        if os.path.getsize(self.path) < state["offset"]:
+            return
+        with open(self.path, "rb") as f:
+            if f.readline().decode().rstrip("\r\n") != state["header"]:
+                return
+        try:
+            tracker = PnLTracker.from_dict(state["tracker"]) if state["tracker"] else None
+        except KeyError:
+            return  # written by an older version; replay the ledger instead
+        self.offset = state["offset"]
+        self.header = state["header"]
+        self.tracker = tracker
+        self.skipped = state.get("skipped", [])
+
+    def checkpoint(self):
+        state = {
+            "offset": self.offset,
+            "header": self.header,
+            "tracker": self.tracker.to_dict() if self.tracker else None,
+            "skipped": self.skipped,
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+        self._rows_since_checkpoint = 0
+
+    def _apply(self, rows):
+        for side, symbol, shares, price, fee, total, cash_after in rows.itertuples(index=False, name=None):
+            if self.tracker is None:
+                starting_cash = cash_after + total if side == BUY else cash_after - total
+                self.tracker = PnLTracker(starting_cash, self.method)
+            try:
+                self.tracker.apply(side, symbol, shares, price, fee)
+            except ValueError as e:
+                # A hand-edited or legacy ledger can oversell; leave the row out rather than fail the page
+                self.skipped.append(str(e))
+        self._rows_since_checkpoint += len(rows)
+
+    def load(self):
+        """Restore the saved state and replay only the ledger rows written after it."""
+        self._reset()
+        self._read_state()
+        return self.update()
+
+    def update(self):
+        """Fold in rows appended to the ledger since the last load or update."""
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path, "rb") as f:
+            if self.offset == 0:
+                self.header = f.readline().decode().rstrip("\r\n")
+                self.offset = f.tell()
+            f.seek(self.offset)
+            if f.read(1):
+                f.seek(self.offset)
+                chunks = pd.read_csv(
+                    f,
+                    header=None,
+                    names=self.header.split(","),
+                    usecols=self.COLUMNS,
+                    chunksize=REPLAY_CHUNK_SIZE,
+                )
+                for chunk in chunks:
+                    self._apply(chunk[self.COLUMNS])
+            # Where reading stopped, not the file size, so rows appended meanwhile are not skipped
+            self.offset = f.tell()
+
+        if self._rows_since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+        return self
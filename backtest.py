@@ -0,0 +1,208 @@
+"""Vectorized backtests of simple trading signals over price histories from a PriceStore.
+
+Usage: python backtest.py AAPL,MSFT,NVDA [--signal sma_crossover] [--fast 5,10,20] [--slow 50,100,200]
+       [--years 5] [--processes 8] [--top 10] [--output results.csv] [--random-walk]
+"""
+import argparse
+import itertools
+import os
+import tempfile
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from fees import PAPER_TRADING_FEE
+from price_store import PriceStore, RandomWalkProvider
+
+INITIAL_CASH = 10000
+
+
+# Align the Close column of several OHLCV frames (as returned by yf.download / PriceStore) into one matrix
+def close_matrix(frames, dtype=np.float64):
+    """frames maps symbol -> OHLCV DataFrame; returns (dates, symbols, T x N array)."""
+    frames = {symbol: data for symbol, data in frames.items() if not data.empty}
+    if not frames:
+        return pd.DatetimeIndex([]), [], np.empty((0, 0), dtype=dtype)
+    closes = pd.concat({symbol: data["Close"] for symbol, data in frames.items()}, axis=1).sort_index()
+    closes = closes.ffill()
+    return closes.index, list(closes.columns), closes.to_numpy(dtype=dtype)
+
+
+# Load closes for many symbols from a PriceStore (live, cached or fixture-backed), fetching in parallel
+def load_close_matrix(store, symbols, start, end, dtype=np.float64):
+    return close_matrix(store.history_many(symbols, start, end), dtype)
+
+
+def rolling_mean(values, window):
+    """Trailing mean over window rows for every column at once; NaN wherever the window is missing data.
+
+    Sums run over valid values only, so a leading NaN (a symbol that listed later) does not spread
+    to every later row.
+    """
+    out = np.full(values.shape, np.nan)
+    if window > len(values):
+        return out
+    zeros = np.zeros((1, values.shape[1]))
+    cumsum = np.nancumsum(np.vstack([zeros, values]), axis=0)
+    counts = np.cumsum(np.vstack([zeros, ~np.isnan(values)]), axis=0)
+    sums = cumsum[window:] - cumsum[:-window]
+    full = counts[window:] - counts[:-window] == window
+    out[window - 1:] = np.where(full, sums / window, np.nan)
+    return out
+
+
+# Signal functions map a T x N close matrix to target positions in [0, 1] (fraction of equity held)
+def sma_crossover(close, fast, slow):
+    """Long while the fast moving average is above the slow one."""
+    if fast >= slow:
+        return np.zeros_like(close)
+    return (rolling_mean(close, fast) > rolling_mean(close, slow)).astype(np.float64)
+
+
+def momentum(close, lookback):
+    """Long while the close is above the close lookback bars ago."""
+    positions = np.zeros_like(close)
+    positions[lookback:] = close[lookback:] > close[:-lookback]
+    return positions
+
+
+def run_backtest(close, positions, fee_model=PAPER_TRADING_FEE, initial_cash=INITIAL_CASH):
+    """Equity curve per column, trading at the close into the positions given for each bar.
+
+    Each column is an independent account starting with initial_cash. Equity follows
+    E[t] = a[t] * E[t-1] - b[t], where a is the market return times the fee multiplier and
+    b the flat fee deduction, which is solved for all bars at once with cumulative products.
+    """
+    valid = ~np.isnan(close)
+    close = np.where(valid, close, 0.0)
+    positions = np.where(valid, positions, 0.0)
+
+    returns = np.zeros_like(close)
+    prev = close[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = np.where(prev > 0, close[1:] / prev - 1, 0.0)
+
+    held = np.vstack([np.zeros((1, close.shape[1])), positions[:-1]])
+    turnover = np.abs(positions - held)
+    multiplier, deduction = fee_model.cost_terms(turnover)
+
+    growth = (1 + held * returns) * multiplier
+    cumulative = np.cumprod(growth, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        discounted = np.where(cumulative > 0, deduction / cumulative, 0.0)
+    equity = cumulative * (initial_cash - np.cumsum(discounted, axis=0))
+    return np.maximum(equity, 0.0)
+
+
+# Summary statistics for each column of an equity matrix
+def summarize(equity, initial_cash=INITIAL_CASH, periods_per_year=252):
+    daily = np.diff(equity, axis=0) / np.where(equity[:-1] > 0, equity[:-1], np.nan)
+    running_max = np.maximum.accumulate(equity, axis=0)
+    drawdown = np.where(running_max > 0, equity / running_max - 1, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.nanmean(daily, axis=0) / np.nanstd(daily, axis=0) * np.sqrt(periods_per_year)
+    return {
+        "final_equity": equity[-1],
+        "total_return": equity[-1] / initial_cash - 1,
+        "max_drawdown": drawdown.min(axis=0),
+        "sharpe": sharpe,
+    }
+
+
+def backtest(close, signal, params, fee_model=PAPER_TRADING_FEE, initial_cash=INITIAL_CASH):
+    positions = signal(close, **params)
+    return run_backtest(close, positions, fee_model, initial_cash)
+
+
+# Close matrix shared by the worker processes of a sweep, set once per process
+_worker_close = None
+
+
+def _init_worker(close):
+    global _worker_close
+    _worker_close = close
+
+
+def _run_batch(signal, batch, fee_model, initial_cash):
+    rows = []
+    for params in batch:
+        equity = backtest(_worker_close, signal, params, fee_model, initial_cash)
+        stats = summarize(equity, initial_cash)
+        for column in range(equity.shape[1]):
+            rows.append({**params, "column": column, **{name: value[column] for name, value in stats.items()}})
+    return rows
+
+
+def parameter_grid(**ranges):
+    """All combinations of the given parameter ranges, e.g. parameter_grid(fast=[5, 10], slow=[50, 200])."""
+    names = list(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*ranges.values())]
+
+
+def sweep(close, symbols, signal, grid, fee_model=PAPER_TRADING_FEE, initial_cash=INITIAL_CASH,
+          processes=None, batch_size=50):
+    """Run signal over every parameter set in grid across a process pool; one result row per (params, symbol)."""
+    batches = [grid[i:i + batch_size] for i in range(0, len(grid), batch_size)]
+    processes = processes or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(close,)) as pool:
+        futures = [pool.submit(_run_batch, signal, batch, fee_model, initial_cash) for batch in batches]
+        rows = [row for future in futures for row in future.result()]
+    results = pd.DataFrame(rows)
+    if not results.empty:
+        results.insert(0, "symbol", [symbols[c] for c in results.pop("column")])
+    return results
+
+
+# Signals the command line can sweep, with the parameters each one takes
+SIGNALS = {
+    "sma_crossover": (sma_crossover, ["fast", "slow"]),
+    "momentum": (momentum, ["lookback"]),
+}
+
+
+def _ints(text):
+    return [int(value) for value in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("symbols", help="comma-separated tickers")
+    parser.add_argument("--signal", choices=list(SIGNALS), default="sma_crossover")
+    parser.add_argument("--fast", type=_ints, default=[5, 10, 20, 50], help="sma_crossover fast windows")
+    parser.add_argument("--slow", type=_ints, default=[50, 100, 200], help="sma_crossover slow windows")
+    parser.add_argument("--lookback", type=_ints, default=[20, 60, 120, 250], help="momentum lookbacks")
+    parser.add_argument("--years", type=int, default=5, help="years of daily history")
+    parser.add_argument("--processes", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--top", type=int, default=10, help="best results to print, by Sharpe ratio")
+    parser.add_argument("--output", help="write every result row to this CSV")
+    parser.add_argument("--random-walk", action="store_true", help="synthetic bars instead of Yahoo Finance")
+    args = parser.parse_args()
+
+    # The same on-disk cache as stocks.py, so symbols charted there load without a fetch
+    if args.random_walk:
+        store = PriceStore(RandomWalkProvider(), directory=tempfile.mkdtemp(prefix="backtest-"))
+    else:
+        store = PriceStore()
+    end = datetime.now()
+    start = end - timedelta(days=args.years * 365)
+    dates, symbols, close = load_close_matrix(store, args.symbols.upper().split(","), start, end)
+    if not symbols:
+        parser.error("no price history for any of the symbols")
+
+    signal, names = SIGNALS[args.signal]
+    grid = parameter_grid(**{name: getattr(args, name) for name in names})
+    if args.signal == "sma_crossover":
+        grid = [params for params in grid if params["fast"] < params["slow"]]
+    results = sweep(close, symbols, signal, grid, processes=args.processes)
+
+    print(f"{len(grid)} parameter sets x {len(symbols)} symbols over {len(dates)} bars "
+          f"({dates[0]:%Y-%m-%d} to {dates[-1]:%Y-%m-%d})")
+    print(results.sort_values("sharpe", ascending=False).head(args.top).to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Offline benchmarks for the apps' hot paths against synthetic data.
+
+Usage: python benchmark.py --sizes 10,1000,100000 [--repeat 3] [--json results.json]
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+from decimation import decimate
+from execution import BUY, SELL, Order, PositionBook
+from fees import PAPER_TRADING_FEE
+from ledger import LEDGER_COLUMNS, Ledger
+from portfolio_store import PORTFOLIO_COLUMNS, PortfolioStore
+from market_sim import SimulatedMarket, run_load_test, simulate_orders
+from price_store import PriceStore, RandomWalkProvider
+from valuation import value_portfolio
+
+DEFAULT_SIZES = [10, 1000, 100000]
+
+
+def synthetic_symbols(n):
+    return [f"S{i:05d}" for i in range(n)]
+
+
+# Ledger of n rows over a small universe, with consistent running cash and shares
+def write_synthetic_ledger(path, rows, n_symbols=50, seed=0):
+    rng = np.random.default_rng(seed)
+    symbols = np.array(synthetic_symbols(n_symbols))[rng.integers(0, n_symbols, rows)]
+    shares = rng.integers(1, 100, rows)
+    price = rng.uniform(10, 500, rows).round(2)
+    # Buys only keep every row valid without simulating sell constraints
+    total = shares * price + 10
+    frame = pd.DataFrame(
+        {
+            "Date": "2024-01-02 10:00:00",
+            "Type": BUY,
+            "Stock Symbol": symbols,
+            "Shares": shares,
+            "Price per Share": price,
+            "Transaction Fee": 10,
+            "Total Amount": total,
+            "Available Cash": 1e12 - np.cumsum(total),
+            "Shares Owned": pd.Series(shares).groupby(symbols).cumsum().to_numpy(),
+        },
+        columns=LEDGER_COLUMNS,
+    )
+    frame.to_csv(path, index=False)
+
+
+def synthetic_portfolio(n, seed=0):
+    rng = np.random.default_rng(seed)
+    symbols = synthetic_symbols(n)
+    portfolio = pd.DataFrame(
+        {
+            "Symbol": symbols,
+            "Shares": rng.integers(1, 1000, n).astype(float),
+            "Purchase Price": rng.uniform(10, 500, n),
+            "Transaction Fee": rng.uniform(0, 20, n),
+            "Transaction Date": "2024-01-02 10:00:00",
+        }
+    )
+    prices = pd.Series(rng.uniform(10, 500, n), index=symbols)
+    return portfolio, prices
+
+
+# Each benchmark takes (size, workdir) and returns a zero-argument callable to time
+def bench_ledger_cold_load(size, workdir):
+    path = os.path.join(workdir, "ledger.csv")
+    write_synthetic_ledger(path, size)
+    return lambda: Ledger(path, checkpoint_path=os.path.join(workdir, "none.json"), checkpoint_every=math.inf).load()
+
+
+def bench_ledger_warm_load(size, workdir):
+    path = os.path.join(workdir, "ledger.csv")
+    write_synthetic_ledger(path, size)
+    Ledger(path, checkpoint_every=0).load()  # writes a checkpoint covering every row
+    return lambda: Ledger(path).load()
+
+
+# Portfolio database holding size synthetic positions, written in one transaction
+def seeded_portfolio_store(size, workdir):
+    path = os.path.join(workdir, "portfolio.db")
+    store = PortfolioStore(path, initial_balance=1e12)
+    portfolio, _ = synthetic_portfolio(size)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO positions VALUES (?, ?, ?, ?, ?)",
+            portfolio[PORTFOLIO_COLUMNS].itertuples(index=False, name=None),
+        )
+    conn.close()
+    return store, portfolio
+
+
+def bench_portfolio_load(size, workdir):
+    store, _ = seeded_portfolio_store(size, workdir)
+    return store.load
+
+
+def bench_portfolio_trade(size, workdir):
+    store, portfolio = seeded_portfolio_store(size, workdir)
+    symbol = portfolio["Symbol"].iloc[-1]
+    return lambda: store.buy(symbol, 1, 100.0, 0.2, "2024-01-02 10:00:00")
+
+
+def bench_valuation(size, workdir):
+    portfolio, prices = synthetic_portfolio(size)
+    return lambda: value_portfolio(portfolio, prices)
+
+
+def bench_execution(size, workdir):
+    rng = np.random.default_rng(0)
+    symbols = synthetic_symbols(min(size, 500))
+    orders = [
+        Order(BUY if i % 3 else SELL, symbols[i % len(symbols)], int(rng.integers(1, 10)), 100.0, "2024-01-02 10:00:00")
+        for i in range(size)
+    ]
+    return lambda: PositionBook(1e12, PAPER_TRADING_FEE).execute(orders)
+
+
+def bench_simulated_trading(size, workdir):
+    """Orders priced from a random-walk market, executed against an in-memory book."""
+    market = SimulatedMarket(RandomWalkProvider(), datetime(2023, 1, 1), datetime(2024, 1, 1))
+    orders = simulate_orders(market, synthetic_symbols(50), size)
+    return lambda: PositionBook(1e12, PAPER_TRADING_FEE).execute(orders)
+
+
+def bench_simulated_load_test(size, workdir):
+    """size random-walk orders through the book and then, one transaction each, into a portfolio database."""
+    market = SimulatedMarket(RandomWalkProvider(), datetime(2023, 1, 1), datetime(2024, 1, 1))
+    store = PortfolioStore(os.path.join(workdir, "portfolio.db"), initial_balance=1e12)
+    return lambda: run_load_test(market, synthetic_symbols(50), size, cash=1e12, store=store)
+
+
+def bench_fetch_and_plot(size, workdir):
+    """size is the number of bars of history; the stub provider stands in for Yahoo Finance."""
+    end = datetime(2024, 1, 1)
+    start = end - timedelta(days=math.ceil(size * 7 / 5))
+    store = PriceStore(RandomWalkProvider(), directory=os.path.join(workdir, "prices"))
+    store.history("AAPL", start, end)  # warm the on-disk cache
+
+    # The same trace stocks.py draws, serialized as it is for the browser
+    def run():
+        data = PriceStore(RandomWalkProvider(), directory=store.directory).history("AAPL", start, end)
+        chart_data = decimate(data, "Close", 1500)
+        fig = go.Figure(go.Scatter(x=chart_data.index, y=chart_data["Close"], mode="lines", name="Close"))
+        return fig.to_json()
+
+    return run
+
+
+BENCHMARKS = {
+    "ledger_cold_load": bench_ledger_cold_load,
+    "ledger_warm_load": bench_ledger_warm_load,
+    "portfolio_load": bench_portfolio_load,
+    "portfolio_trade": bench_portfolio_trade,
+    "valuation": bench_valuation,
+    "execution": bench_execution,
+    "simulated_trading": bench_simulated_trading,
+    "simulated_load_test": bench_simulated_load_test,
+    "fetch_and_plot": bench_fetch_and_plot,
+}
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+# Log-log slope of latency against size: ~1 is linear, ~0 is constant
+def scaling_exponent(sizes, latencies):
+    points = [(math.log(s), math.log(t)) for s, t in zip(sizes, latencies) if s > 0 and t > 0]
+    if len(points) < 2:
+        return float("nan")
+    x, y = np.array(points).T
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def run(sizes, names, repeat):
+    results = []
+    for name in names:
+        latencies = []
+        for size in sizes:
+            workdir = tempfile.mkdtemp(prefix="bench-")
+            try:
+                latency, peak = measure(BENCHMARKS[name](size, workdir), repeat)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            latencies.append(latency)
+            results.append({"benchmark": name, "size": size, "latency_s": latency, "peak_bytes": peak})
+            print(f"{name:<18} {size:>10,} {latency * 1000:>12.3f} ms {peak / 2**20:>10.2f} MiB")
+        print(f"{name:<18} {'scaling':>10} {scaling_exponent(sizes, latencies):>15.2f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated data sizes")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="comma-separated benchmark names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    names = args.only.split(",")
+    print(f"{'benchmark':<18} {'size':>10} {'latency':>15} {'peak mem':>14}")
+    results = run(sizes, names, args.repeat)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Build symbols.csv from the NASDAQ Trader symbol directory (every NASDAQ, NYSE, NYSE American,
+NYSE Arca and Cboe listing, several thousand tickers).
+
+Usage: python build_symbols.py [--output symbols.csv] [--include-etfs]
+"""
+import argparse
+import csv
+import urllib.request
+
+from symbols import SYMBOLS_FILE
+
+NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
+OTHER_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt"
+
+# Exchange codes used in otherlisted.txt
+EXCHANGES = {
+    "A": "NYSE American",
+    "N": "NYSE",
+    "P": "NYSE Arca",
+    "Z": "Cboe BZX",
+    "V": "IEX",
+}
+
+
+def _read_directory(url):
+    """Rows of a pipe-delimited directory file, without its trailing "File Creation Time" line."""
+    with urllib.request.urlopen(url, timeout=30) as response:
+        text = response.read().decode("utf-8", errors="replace")
+    lines = [line for line in text.splitlines() if line and not line.startswith("File Creation Time")]
+    return list(csv.DictReader(lines, delimiter="|"))
+
+
+# Yahoo Finance writes share classes with a dash (BRK-B) where the directory uses a dot (BRK.B)
+def yahoo_symbol(symbol):
+    return symbol.strip().replace(".", "-")
+
+
+def listings(include_etfs=False):
+    rows = {}
+    for row in _read_directory(NASDAQ_LISTED_URL):
+        if row["Test Issue"] == "Y" or (row["ETF"] == "Y" and not include_etfs):
+            continue
+        symbol = yahoo_symbol(row["Symbol"])
+        rows[symbol] = {"Symbol": symbol, "Name": row["Security Name"].strip(), "Exchange": "NASDAQ", "Currency": "USD"}
+    for row in _read_directory(OTHER_LISTED_URL):
+        if row["Test Issue"] == "Y" or (row["ETF"] == "Y" and not include_etfs):
+            continue
+        symbol = yahoo_symbol(row["ACT Symbol"])
+        exchange = EXCHANGES.get(row["Exchange"], row["Exchange"])
+        rows.setdefault(symbol, {"Symbol": symbol, "Name": row["Security Name"].strip(), "Exchange": exchange, "Currency": "USD"})
+    return [rows[symbol] for symbol in sorted(rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=SYMBOLS_FILE, help="CSV to write (default: %(default)s)")
+    parser.add_argument("--include-etfs", action="store_true", help="also list ETFs")
+    args = parser.parse_args()
+
+    rows = listings(args.include_etfs)
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["Symbol", "Name", "Exchange", "Currency"])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Wrote {len(rows)} symbols to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
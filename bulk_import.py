@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from execution import BUY, SELL
+from ledger import LEDGER_COLUMNS
+
+# Rows parsed per chunk while streaming an import file
+IMPORT_CHUNK_SIZE = 100000
+
+# Common broker statement headers mapped onto the ledger's column names
+COLUMN_ALIASES = {
+    "Symbol": "Stock Symbol",
+    "Ticker": "Stock Symbol",
+    "Action": "Type",
+    "Side": "Type",
+    "Quantity": "Shares",
+    "Qty": "Shares",
+    "Price": "Price per Share",
+    "Fee": "Transaction Fee",
+    "Fees": "Transaction Fee",
+    "Commission": "Transaction Fee",
+    "Trade Date": "Date",
+}
+
+TYPE_ALIASES = {
+    "BUY": BUY,
+    "BOUGHT": BUY,
+    "B": BUY,
+    "SELL": SELL,
+    "SOLD": SELL,
+    "S": SELL,
+}
+
+REQUIRED_COLUMNS = ["Date", "Type", "Stock Symbol", "Shares", "Price per Share"]
+
+
+# Raised when an import file is malformed, a row is invalid, or a row would overdraw cash or holdings
+class BulkImportError(Exception):
+    pass
+
+
+def _normalize(chunk, default_fee, first_row):
+    chunk = chunk.rename(columns=lambda c: COLUMN_ALIASES.get(c.strip(), c.strip()))
+    missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise BulkImportError(f"Missing columns: {', '.join(missing)}")
+
+    chunk["Type"] = chunk["Type"].astype(str).str.strip().str.upper().map(TYPE_ALIASES)
+    chunk["Stock Symbol"] = chunk["Stock Symbol"].astype(str).str.strip().str.upper()
+    chunk["Shares"] = pd.to_numeric(chunk["Shares"], errors="coerce").abs()
+    chunk["Price per Share"] = pd.to_numeric(chunk["Price per Share"], errors="coerce")
+    if "Transaction Fee" in chunk.columns:
+        chunk["Transaction Fee"] = pd.to_numeric(chunk["Transaction Fee"], errors="coerce").fillna(default_fee)
+    else:
+        chunk["Transaction Fee"] = default_fee
+
+    invalid = (
+        chunk["Type"].isna()
+        | ~(chunk["Shares"] > 0)
+        | ~(chunk["Price per Share"] > 0)
+        | chunk["Stock Symbol"].isin(["", "NAN"])
+    )
+    if invalid.any():
+        row = first_row + int(np.argmax(invalid.to_numpy()))
+        raise BulkImportError(f"Row {row}: invalid type, symbol, shares or price")
+    # The ledger and the book hold whole shares, like the rows entered by hand
+    fractional = (chunk["Shares"] % 1 != 0).to_numpy()
+    if fractional.any():
+        row = first_row + int(np.argmax(fractional))
+        raise BulkImportError(f"Row {row}: fractional share quantities are not supported")
+    chunk["Shares"] = chunk["Shares"].astype(np.int64)
+    return chunk
+
+
+def validate_transactions(chunk, cash, holdings, default_fee, first_row=1):
+    """Fill in Total Amount, Available Cash and Shares Owned for a chunk in one vectorized pass.
+
+    cash and holdings are the state before the chunk; raises BulkImportError at the first row
+    that would take cash or any symbol's shares below zero.
+    """
+    chunk = _normalize(chunk, default_fee, first_row)
+    is_buy = (chunk["Type"] == BUY).to_numpy()
+    notional = (chunk["Shares"] * chunk["Price per Share"]).to_numpy()
+    fee = chunk["Transaction Fee"].to_numpy(dtype=float)
+
+    total_amount = np.where(is_buy, notional + fee, notional - fee)
+    available_cash = cash + np.cumsum(np.where(is_buy, -total_amount, total_amount))
+
+    signed_shares = chunk["Shares"].where(is_buy, -chunk["Shares"])
+    start_shares = chunk["Stock Symbol"].map(holdings).fillna(0)
+    # Whole shares, written as integers like the rows entered by hand (fillna leaves the start as float)
+    shares_owned = (signed_shares.groupby(chunk["Stock Symbol"]).cumsum() + start_shares).to_numpy().astype(np.int64)
+
+    # Report whichever problem comes first in the file
+    overdrawn = available_cash < -1e-9
+    oversold = shares_owned < 0
+    bad = overdrawn | oversold
+    if bad.any():
+        i = int(np.argmax(bad))
+        if overdrawn[i]:
+            raise BulkImportError(f"Row {first_row + i}: insufficient funds for this transaction")
+        raise BulkImportError(f"Row {first_row + i}: not enough shares of {chunk['Stock Symbol'].iloc[i]} to sell")
+
+    chunk["Total Amount"] = total_amount
+    chunk["Available Cash"] = available_cash
+    chunk["Shares Owned"] = shares_owned
+    return chunk[LEDGER_COLUMNS]
+
+
+def import_transactions(source, ledger, initial_cash, default_fee, chunksize=IMPORT_CHUNK_SIZE):
+    """Stream a CSV of trades, validate it against running cash and holdings, and append it to the ledger.
+
+    Nothing is written unless every row is valid. Returns the number of rows imported.
+    """
+    cash = ledger.cash if ledger.cash is not None else initial_cash
+    holdings = dict(ledger.holdings)
+    validated = []
+    first_row = 1
+    try:
+        for chunk in pd.read_csv(source, chunksize=chunksize):
+            chunk = validate_transactions(chunk, cash, holdings, default_fee, first_row)
+            if chunk.empty:
+                continue
+            cash = float(chunk["Available Cash"].iloc[-1])
+            holdings.update(chunk.groupby("Stock Symbol", sort=False)["Shares Owned"].last().to_dict())
+            validated.append(chunk)
+            first_row += len(chunk)
+    except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise BulkImportError(f"Could not read the file as CSV: {e}") from e
+
+    if not validated:
+        return 0
+    transactions = pd.concat(validated, ignore_index=True)
+    ledger.append_many(transactions)
+    return len(transactions)
@@ -0,0 +1,84 @@
+import numpy as np
+
+# Trading periods per year, used to annualize daily covariance
+PERIODS_PER_YEAR = 252
+
+
+# All functions take the T x N close matrix from backtest.close_matrix (float32 is enough for display)
+# and treat NaN as "no data yet", e.g. before a symbol listed.
+
+def normalized(close, base=100.0):
+    """Each column rescaled so its first valid close equals base."""
+    valid = ~np.isnan(close)
+    first_row = valid.argmax(axis=0)
+    first = close[first_row, np.arange(close.shape[1])]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return close / first * np.float32(base)
+
+
+def log_returns(close):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(close), axis=0)
+    returns[~np.isfinite(returns)] = np.nan
+    return returns
+
+
+def _pairwise_moments(returns):
+    """Per-pair observation counts, sums and cross products over rows where both columns have data."""
+    valid = ~np.isnan(returns)
+    x = np.where(valid, returns, 0.0).astype(np.float64)
+    mask = valid.astype(np.float64)
+    n = mask.T @ mask
+    sum_x = x.T @ mask  # [i, j]: sum of column i over the rows where j is valid too
+    sum_xx = (x * x).T @ mask
+    sum_xy = x.T @ x
+    return n, sum_x, sum_xx, sum_xy
+
+
+def covariance(returns, annualize=True, periods_per_year=PERIODS_PER_YEAR):
+    """N x N covariance matrix using pairwise-complete observations."""
+    n, sum_x, _, sum_xy = _pairwise_moments(returns)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (sum_xy - sum_x * sum_x.T / n) / (n - 1)
+    cov[n < 2] = np.nan
+    if annualize:
+        cov *= periods_per_year
+    return cov.astype(np.float32)
+
+
+def correlation(returns):
+    """N x N Pearson correlation matrix using pairwise-complete observations."""
+    n, sum_x, sum_xx, sum_xy = _pairwise_moments(returns)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sum_xy - sum_x * sum_x.T / n
+        var = sum_xx - sum_x * sum_x / n  # [i, j]: variance of i over the rows shared with j
+        corr = cov / np.sqrt(var * var.T)
+    corr[n < 2] = np.nan
+    np.fill_diagonal(corr, np.where(np.diag(n) >= 2, 1.0, np.nan))
+    return np.clip(corr, -1, 1).astype(np.float32)
+
+
+def _window_sums(values, window):
+    cumsum = np.cumsum(np.vstack([np.zeros((1, values.shape[1])), values]), axis=0)
+    sums = np.full(values.shape, np.nan)
+    sums[window - 1:] = cumsum[window:] - cumsum[:-window]
+    return sums
+
+
+def rolling_correlation(returns, benchmark, window):
+    """Correlation of every column with the benchmark column over a trailing window, T x N.
+
+    Computed from cumulative sums, so the cost is O(T * N) whatever the window length.
+    """
+    y = returns[:, [benchmark]]
+    valid = ~np.isnan(returns) & ~np.isnan(y)
+    x = np.where(valid, returns, 0.0).astype(np.float64)
+    y = np.where(valid, y, 0.0).astype(np.float64)
+    n = _window_sums(valid.astype(np.float64), window)
+    sum_x, sum_y = _window_sums(x, window), _window_sums(y, window)
+    sum_xx, sum_yy, sum_xy = _window_sums(x * x, window), _window_sums(y * y, window), _window_sums(x * y, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sum_xy - sum_x * sum_y / n
+        corr = cov / np.sqrt((sum_xx - sum_x ** 2 / n) * (sum_yy - sum_y ** 2 / n))
+    corr[n < max(2, window // 2)] = np.nan
+    return np.clip(corr, -1, 1).astype(np.float32)
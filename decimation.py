@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+# Candidate bar sizes for OHLC resampling, smallest first, with their approximate length
+RESAMPLE_RULES = [
+    ("1min", pd.Timedelta(minutes=1)),
+    ("5min", pd.Timedelta(minutes=5)),
+    ("15min", pd.Timedelta(minutes=15)),
+    ("30min", pd.Timedelta(minutes=30)),
+    ("1H", pd.Timedelta(hours=1)),
+    ("4H", pd.Timedelta(hours=4)),
+    ("1D", pd.Timedelta(days=1)),
+    ("W", pd.Timedelta(weeks=1)),
+    ("M", pd.Timedelta(days=31)),
+    ("Q", pd.Timedelta(days=92)),
+]
+
+OHLC_AGGREGATION = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Adj Close": "last",
+    "Volume": "sum",
+}
+
+
+# Largest-Triangle-Three-Buckets: pick n_out points that preserve the visual shape of (x, y)
+def lttb(x, y, n_out):
+    """Return the indices of the points to keep, always including the first and last point."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        # Average of the next bucket is the third vertex of the triangle
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    keep[-1] = n - 1
+    return keep
+
+
+# Decimate a time-indexed frame to at most max_points rows using LTTB on one column
+def decimate(data, column, max_points):
+    data = data.dropna(subset=[column])
+    if len(data) <= max_points:
+        return data
+    x = data.index.asi8 // 10**9  # seconds, so gaps such as weekends keep their width
+    return data.iloc[lttb(x, data[column].to_numpy(), max_points)]
+
+
+# Smallest bar size that brings the visible range down to at most max_points bars
+def resample_rule(index, max_points):
+    if len(index) < 2:
+        return RESAMPLE_RULES[0][0]
+    target = (index[-1] - index[0]) / max_points
+    for rule, length in RESAMPLE_RULES:
+        if length >= target:
+            return rule
+    return RESAMPLE_RULES[-1][0]
+
+
+# Aggregate OHLCV bars into coarser bars (e.g. "1H", "W"); other columns such as indicators keep their last value
+def resample_ohlc(data, rule):
+    aggregation = {column: OHLC_AGGREGATION.get(column, "last") for column in data.columns}
+    return data.resample(rule).agg(aggregation).dropna(subset=["Close"])
@@ -0,0 +1,121 @@
+import datetime
+
+from fees import PAPER_TRADING_FEE
+
+BUY = "Buy"
+SELL = "Sell"
+
+
+# Raised when a trade would overdraw cash or sell shares that are not held
+class TradeError(Exception):
+    pass
+
+
+class Position:
+    __slots__ = ("symbol", "shares", "purchase_price", "fees", "last_date")
+
+    def __init__(self, symbol, shares=0, purchase_price=0.0, fees=0.0, last_date=None):
+        self.symbol = symbol
+        self.shares = shares
+        self.purchase_price = purchase_price
+        self.fees = fees
+        self.last_date = last_date
+
+
+class Order:
+    __slots__ = ("side", "symbol", "shares", "price", "date")
+
+    def __init__(self, side, symbol, shares, price, date=None):
+        self.side = side
+        self.symbol = symbol
+        self.shares = shares
+        self.price = price
+        self.date = date or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Result of an executed order: fee charged, cash moved and the state right after it
+class Fill:
+    __slots__ = ("order", "fee", "amount", "cash_after", "shares_after")
+
+    def __init__(self, order, fee, amount, cash_after, shares_after):
+        self.order = order
+        self.fee = fee
+        self.amount = amount  # cash paid for a buy (cost + fee) or received for a sell (proceeds - fee)
+        self.cash_after = cash_after
+        self.shares_after = shares_after
+
+
+# Cash plus a dict of positions keyed by symbol; orders are checked and applied in O(1) each
+class PositionBook:
+    def __init__(self, cash, fee_model=PAPER_TRADING_FEE, positions=None):
+        self.cash = cash
+        self.fee_model = fee_model
+        self.positions = positions or {}
+
+    @classmethod
+    def from_holdings(cls, cash, holdings, fee_model=PAPER_TRADING_FEE):
+        """Build a book from a {symbol: shares} mapping."""
+        return cls(cash, fee_model, {symbol: Position(symbol, shares) for symbol, shares in holdings.items()})
+
+    @classmethod
+    def from_portfolio(cls, portfolio, cash, fee_model=PAPER_TRADING_FEE):
+        """Build a book from a portfolio DataFrame with Symbol, Shares and Purchase Price columns."""
+        positions = {}
+        for symbol, shares, price in zip(portfolio["Symbol"], portfolio["Shares"], portfolio["Purchase Price"]):
+            positions[symbol] = Position(symbol, shares, price)
+        return cls(cash, fee_model, positions)
+
+    def shares(self, symbol):
+        position = self.positions.get(symbol)
+        return position.shares if position is not None else 0
+
+    def holdings(self):
+        return {symbol: position.shares for symbol, position in self.positions.items()}
+
+    def execute_one(self, order):
+        """Apply one order; raises TradeError and leaves the book untouched if it cannot be filled."""
+        if order.shares <= 0:
+            raise TradeError("Quantity must be greater than zero.")
+        notional = order.shares * order.price
+        fee = self.fee_model(notional)
+        position = self.positions.get(order.symbol)
+
+        if order.side == BUY:
+            amount = notional + fee
+            if amount > self.cash:
+                raise TradeError("Insufficient funds for this transaction.")
+            if position is None:
+                position = self.positions[order.symbol] = Position(order.symbol, 0, order.price)
+            # Average cost per share, the same basis PortfolioStore keeps
+            held = position.shares + order.shares
+            position.purchase_price = (position.shares * position.purchase_price + notional) / held
+            self.cash -= amount
+            position.shares = held
+        elif order.side == SELL:
+            held = position.shares if position is not None else 0
+            if position is None or held < order.shares:
+                raise TradeError(
+                    f"You do not have enough shares of {order.symbol} to sell. You have {held} shares."
+                )
+            amount = notional - fee
+            self.cash += amount
+            position.shares -= order.shares
+        else:
+            raise TradeError(f"Unknown order side: {order.side}")
+
+        position.fees += fee
+        position.last_date = order.date
+        if position.shares == 0:
+            del self.positions[order.symbol]
+        return Fill(order, fee, amount, self.cash, position.shares)
+
+    def execute(self, orders):
+        """Apply orders in sequence; returns (fills, rejected) where rejected holds (order, reason) pairs."""
+        fills = []
+        rejected = []
+        for order in orders:
+            try:
+                fills.append(self.execute_one(order))
+            except TradeError as e:
+                rejected.append((order, str(e)))
+        return fills, rejected
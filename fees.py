@@ -0,0 +1,34 @@
+import numpy as np
+
+
+# Fixed charge per trade, as in stock_transaction.py ($10)
+class FlatFee:
+    def __init__(self, amount):
+        self.amount = amount
+
+    def __call__(self, notional):
+        """Fee for a trade (or array of trades) of the given notional value."""
+        if np.ndim(notional):
+            return np.full(np.shape(notional), float(self.amount))
+        return self.amount
+
+    def cost_terms(self, turnover):
+        """(multiplier, deduction) applied to equity for trades of turnover fraction of equity."""
+        return np.ones_like(turnover), np.where(turnover > 0, self.amount, 0.0)
+
+
+# Fee proportional to the traded notional, as in papertrading.py (0.2%)
+class PercentFee:
+    def __init__(self, rate):
+        self.rate = rate
+
+    def __call__(self, notional):
+        return np.abs(notional) * self.rate
+
+    def cost_terms(self, turnover):
+        return 1 - self.rate * turnover, np.zeros_like(turnover)
+
+
+# The fee schedules the two apps charge
+STOCK_TRANSACTION_FEE = FlatFee(10)
+PAPER_TRADING_FEE = PercentFee(0.002)
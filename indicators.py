@@ -0,0 +1,258 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Trading periods per year, used to annualize volatility of daily bars
+PERIODS_PER_YEAR = 252
+
+# Bars per year for each interval, assuming a 6.5 hour regular trading session
+BARS_PER_YEAR = {
+    "1d": PERIODS_PER_YEAR,
+    "1h": PERIODS_PER_YEAR * 7,  # six full hours and the closing half hour
+    "30m": PERIODS_PER_YEAR * 13,
+    "15m": PERIODS_PER_YEAR * 26,
+    "5m": PERIODS_PER_YEAR * 78,
+    "1m": PERIODS_PER_YEAR * 390,
+}
+
+
+# Base class for an indicator computed from closes and stored alongside the price history.
+# update() fills rows [start, len(close)) given the stored rows before start, so appending
+# new bars only touches the new bars plus the few bars of context the indicator needs.
+# interval is the bar interval of close, for indicators that depend on the bar spacing.
+class Indicator:
+    name = None
+    overlay = False  # drawn on the price axis rather than in a panel of its own
+
+    @property
+    def columns(self):
+        return [self.name]
+
+    def update(self, close, stored, start, interval="1d"):
+        raise NotImplementedError
+
+
+# Indicators defined by a trailing window over the closes
+class RollingIndicator(Indicator):
+    context = 0  # bars before start needed to compute the value at start
+
+    def compute(self, close, interval="1d"):
+        raise NotImplementedError
+
+    def update(self, close, stored, start, interval="1d"):
+        first = max(0, start - self.context)
+        values = self.compute(close.iloc[first:], interval)
+        return values.iloc[start - first:].to_frame(self.name)
+
+
+class SMA(RollingIndicator):
+    overlay = True
+
+    def __init__(self, window):
+        self.window = window
+        self.name = f"SMA {window}"
+        self.context = window - 1
+
+    def compute(self, close, interval="1d"):
+        return close.rolling(self.window).mean()
+
+
+class Volatility(RollingIndicator):
+    """Annualized standard deviation of log returns over the window, scaled by the bars per year of the interval."""
+
+    def __init__(self, window, bars_per_year=None):
+        self.window = window
+        self.bars_per_year = bars_per_year or BARS_PER_YEAR
+        self.name = f"Volatility {window}"
+        self.context = window
+
+    def compute(self, close, interval="1d"):
+        log_returns = np.log(close).diff()
+        return log_returns.rolling(self.window).std() * np.sqrt(self.bars_per_year[interval])
+
+
+class Returns(RollingIndicator):
+    name = "Return"
+    context = 1
+
+    def compute(self, close, interval="1d"):
+        return close.pct_change()
+
+
+# Exponentially smoothed series: the stored value at start - 1 seeds the recursion for new bars
+def _smooth(values, alpha, previous=None, min_periods=0):
+    if previous is None or np.isnan(previous):
+        return values.ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean()
+    seeded = pd.concat([pd.Series([previous]), values], ignore_index=True)
+    smoothed = seeded.ewm(alpha=alpha, adjust=False).mean().iloc[1:]
+    smoothed.index = values.index
+    return smoothed
+
+
+def _previous(stored, column, start):
+    if start == 0 or stored is None:
+        return None
+    return stored[column].iloc[start - 1]
+
+
+class EMA(Indicator):
+    overlay = True
+
+    def __init__(self, span):
+        self.span = span
+        self.name = f"EMA {span}"
+
+    def update(self, close, stored, start, interval="1d"):
+        previous = _previous(stored, self.name, start)
+        if previous is None or np.isnan(previous):
+            start, previous = 0, None
+        values = _smooth(close.iloc[start:], 2 / (self.span + 1), previous, min_periods=self.span)
+        return values.to_frame(self.name)
+
+
+class RSI(Indicator):
+    """Wilder's relative strength index; the smoothed gains and losses are kept as state columns."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.name = f"RSI {window}"
+        self.gain, self.loss = f"_{self.name} gain", f"_{self.name} loss"
+
+    @property
+    def columns(self):
+        return [self.name, self.gain, self.loss]
+
+    def update(self, close, stored, start, interval="1d"):
+        previous_gain = _previous(stored, self.gain, start)
+        previous_loss = _previous(stored, self.loss, start)
+        if previous_gain is None or np.isnan(previous_gain) or np.isnan(previous_loss):
+            start, previous_gain, previous_loss = 0, None, None
+        delta = close.iloc[max(0, start - 1):].diff().iloc[1 if start else 0:]
+        alpha = 1 / self.window
+        gain = _smooth(delta.clip(lower=0), alpha, previous_gain, min_periods=self.window)
+        loss = _smooth(-delta.clip(upper=0), alpha, previous_loss, min_periods=self.window)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(loss > 0, 100 - 100 / (1 + gain / loss), np.where(gain > 0, 100.0, 50.0))
+        rsi = pd.Series(rsi, index=delta.index).where(gain.notna())
+        return pd.DataFrame({self.name: rsi, self.gain: gain, self.loss: loss})
+
+
+class Drawdown(Indicator):
+    """Fall from the running peak close, as a fraction; the peak is kept as a state column."""
+
+    name = "Drawdown"
+    peak = "_Drawdown peak"
+
+    @property
+    def columns(self):
+        return [self.name, self.peak]
+
+    def update(self, close, stored, start, interval="1d"):
+        previous = _previous(stored, self.peak, start)
+        values = close.iloc[start:].to_numpy(dtype=float)
+        if previous is not None:
+            values = np.concatenate([[previous], values])
+        peak = np.fmax.accumulate(values)[1 if previous is not None else 0:]
+        drawdown = close.iloc[start:].to_numpy() / peak - 1
+        return pd.DataFrame({self.name: drawdown, self.peak: peak}, index=close.index[start:])
+
+
+DEFAULT_INDICATORS = [
+    SMA(20),
+    SMA(50),
+    SMA(200),
+    EMA(20),
+    RSI(14),
+    Volatility(20),
+    Drawdown(),
+    Returns(),
+]
+
+
+# Indicator values per ticker and interval, kept in a Parquet file next to the price cache
+# and brought up to date with only the bars the PriceStore added since the last update
+class IndicatorStore:
+    CLOSE = "_Close"  # close each stored row was computed from, to detect a revised last bar
+
+    def __init__(self, price_store, indicators=None):
+        self.price_store = price_store
+        self.indicators = {indicator.name: indicator for indicator in indicators or DEFAULT_INDICATORS}
+        self._frames = {}  # in-memory copy of each file, keyed by (symbol, interval)
+        self._lock = threading.Lock()  # sessions share one store; updates rewrite the file
+
+    def names(self, overlay=None):
+        return [name for name, indicator in self.indicators.items() if overlay is None or indicator.overlay == overlay]
+
+    def _path(self, symbol, interval="1d"):
+        return os.path.splitext(self.price_store._path(symbol, interval))[0] + ".indicators.parquet"
+
+    def _read(self, symbol, interval="1d"):
+        key = (symbol, interval)
+        if key not in self._frames:
+            path = self._path(symbol, interval)
+            self._frames[key] = pd.read_parquet(path) if os.path.exists(path) else None
+        return self._frames[key]
+
+    def _write(self, symbol, table, interval="1d"):
+        path = self._path(symbol, interval)
+        tmp_path = path + ".tmp"
+        table.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        self._frames[(symbol, interval)] = table
+
+    def _valid_rows(self, stored, close):
+        """Number of leading stored rows that still match the price history."""
+        if stored is None or stored.empty or len(stored) > len(close):
+            return 0
+        n = len(stored)
+        if stored.index[0] != close.index[0] or stored.index[-1] != close.index[n - 1]:
+            return 0  # older history was prepended or bars were replaced
+        if stored[self.CLOSE].iloc[-1] != close.iloc[n - 1]:
+            return n - 1  # the last stored bar was still forming when it was computed
+        return n
+
+    def update(self, symbol, bars, names, interval="1d"):
+        """Bring the stored indicators for symbol up to date with bars; returns the full table."""
+        with self._lock:
+            return self._update(symbol, bars, names, interval)
+
+    def _update(self, symbol, bars, names, interval="1d"):
+        close = bars["Close"].astype(float)
+        stored = self._read(symbol, interval)
+        start = self._valid_rows(stored, close)
+        # Everything already stored is kept current too, so no column is left with gaps
+        if stored is not None:
+            names = list(names) + [name for name in self.indicators if name in stored.columns and name not in names]
+        missing = [name for name in names if stored is None or not set(self.indicators[name].columns) <= set(stored.columns)]
+        if start == len(close) and not missing:
+            return stored
+
+        kept = stored.iloc[:start] if start else pd.DataFrame(index=close.index[:0])
+        tail = pd.DataFrame({self.CLOSE: close.iloc[start:]})
+        full = {}
+        for name in names:
+            indicator = self.indicators[name]
+            if name in missing:
+                values = indicator.update(close, None, 0, interval)
+                full.update({column: values[column] for column in indicator.columns})
+            else:
+                values = indicator.update(close, kept, start, interval)
+                for column in indicator.columns:
+                    tail[column] = values[column].to_numpy()
+        table = pd.concat([kept, tail])
+        for column, values in full.items():
+            table[column] = values
+        self._write(symbol, table, interval)
+        return table
+
+    def history(self, symbol, start, end, names, interval="1d"):
+        """OHLCV bars from the price store between start and end, with the named indicator columns."""
+        prices = self.price_store.history(symbol, start, end, interval)
+        bars = self.price_store.cached(symbol, interval)
+        if bars is None or bars.empty or not names:
+            return prices
+        table = self.update(symbol, bars, names, interval)
+        columns = [name for name in names if name in table.columns]
+        return prices.join(table[columns])
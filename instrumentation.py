@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+
+import pandas as pd
+import streamlit as st
+
+# Timings are collected only when the sidebar toggle is on; this sets its initial state
+TIMINGS_DEFAULT = os.environ.get("STOCKS_TIMINGS", "") not in ("", "0")
+
+# Number of recent runs kept per session for export from the debug panel
+TIMING_HISTORY_SIZE = 50
+
+# One JSON record per instrumented run, for shipping to a log collector. The logger has no handler of
+# its own: set STOCKS_TIMINGS_LOG to a file path to append the records there, or attach a handler at INFO
+logger = logging.getLogger("stocks.timings")
+TIMINGS_LOG = os.environ.get("STOCKS_TIMINGS_LOG", "")
+
+
+def log_to_file(path):
+    """Write each run's JSON record to path, one per line."""
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return handler
+
+
+# Modules are imported once per server process, so the handler is added once
+if TIMINGS_LOG and not logger.handlers:
+    log_to_file(TIMINGS_LOG)
+
+# The recorder of the script run executing on this thread, or None while timings are off
+_local = threading.local()
+
+
+# Timed steps and counters for a single run of a page
+class RunRecorder:
+    def __init__(self, page):
+        self.page = page
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.elapsed = None
+        self.steps = []  # (name, seconds) in the order they finished
+        self.counters = Counter()
+
+    def add(self, name, seconds):
+        self.steps.append((name, seconds))
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self._start
+        return self
+
+    def summary(self):
+        """One row per step name with call count, total and slowest time in milliseconds."""
+        steps = pd.DataFrame(self.steps, columns=["Step", "Seconds"])
+        summary = steps.groupby("Step", sort=False)["Seconds"].agg(["count", "sum", "max"])
+        summary.columns = ["Calls", "Total (ms)", "Max (ms)"]
+        summary[["Total (ms)", "Max (ms)"]] *= 1000
+        return summary.sort_values("Total (ms)", ascending=False)
+
+    def to_record(self):
+        return {
+            "page": self.page,
+            "started_at": self.started_at,
+            "elapsed_s": self.elapsed,
+            "steps": [{"name": name, "seconds": seconds} for name, seconds in self.steps],
+            "counters": dict(self.counters),
+        }
+
+
+# Totals across every instrumented run in this server process
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.runs = 0
+        self.calls = Counter()
+        self.seconds = defaultdict(float)
+        self.counters = Counter()
+
+    def record(self, recorder):
+        with self._lock:
+            self.runs += 1
+            for name, seconds in recorder.steps:
+                self.calls[name] += 1
+                self.seconds[name] += seconds
+            self.counters.update(recorder.counters)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "steps": {name: {"calls": self.calls[name], "seconds": self.seconds[name]} for name in self.calls},
+                "counters": dict(self.counters),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+
+metrics = Metrics()
+
+
+def current():
+    return getattr(_local, "recorder", None)
+
+
+def start_run(page, enabled=True):
+    """Begin recording a script run on this thread; with enabled=False every probe is a no-op."""
+    _local.recorder = RunRecorder(page) if enabled else None
+    return _local.recorder
+
+
+def finish_run():
+    """Stop recording, log the run and fold it into the process-wide metrics."""
+    recorder = current()
+    _local.recorder = None
+    if recorder is None:
+        return None
+    recorder.finish()
+    metrics.record(recorder)
+    logger.info(json.dumps(recorder.to_record()))
+    return recorder
+
+
+@contextmanager
+def timer(name):
+    recorder = current()
+    if recorder is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, time.perf_counter() - start)
+
+
+def timed(name=None):
+    """Decorator form of timer(); the step name defaults to the function name."""
+    def decorator(fn):
+        step = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            recorder = current()
+            if recorder is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                recorder.add(step, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    recorder = current()
+    if recorder is not None:
+        recorder.count(name, n)
+
+
+# Sidebar toggle, then start recording this run of the page
+def begin_page(page):
+    enabled = st.sidebar.checkbox("Show timings", value=TIMINGS_DEFAULT, key="show_timings")
+    return start_run(page, enabled)
+
+
+def _remember(recorder):
+    history = st.session_state.setdefault("timing_history", deque(maxlen=TIMING_HISTORY_SIZE))
+    history.append(recorder.to_record())
+    return history
+
+
+# Finish the run and show its timings at the bottom of the sidebar
+def end_page():
+    recorder = finish_run()
+    if recorder is None:
+        return
+    history = _remember(recorder)
+
+    with st.sidebar.expander("Timings", expanded=True):
+        st.caption(f"Run took {recorder.elapsed * 1000:.1f} ms")
+        if recorder.steps:
+            st.dataframe(recorder.summary(), use_container_width=True)
+        if recorder.counters:
+            st.json(dict(recorder.counters))
+        st.download_button(
+            "Export recent runs",
+            json.dumps({"runs": list(history), "metrics": metrics.snapshot()}, indent=2),
+            file_name=f"{recorder.page}_timings.json",
+            mime="application/json",
+        )
+
+
+# st.stop() and st.rerun() end the script before the end_page() at the bottom of a page; these finish
+# the run first, so runs that record a trade or stop early are logged too
+def stop_page():
+    end_page()
+    st.stop()
+
+
+def rerun_page():
+    end_page()
+    st.rerun()
+
+
+@contextmanager
+def fragment_run(name):
+    """Record a fragment's own reruns, which skip the rest of the page, as runs named name.
+
+    During a full page run the fragment's steps go to the page's recorder instead.
+    """
+    if current() is not None:
+        yield
+        return
+    start_run(name, st.session_state.get("show_timings", TIMINGS_DEFAULT))
+    try:
+        yield
+    finally:
+        recorder = finish_run()
+        if recorder is not None:
+            _remember(recorder)
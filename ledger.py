@@ -0,0 +1,193 @@
+import io
+import json
+import os
+
+import pandas as pd
+
+LEDGER_COLUMNS = [
+    "Date",
+    "Type",
+    "Stock Symbol",
+    "Shares",
+    "Price per Share",
+    "Transaction Fee",
+    "Total Amount",
+    "Available Cash",
+    "Shares Owned",
+]
+
+# Write a new checkpoint after this many rows have been replayed or appended
+CHECKPOINT_EVERY = 10000
+
+# Rows read per chunk when replaying the ledger, to bound memory on large files
+REPLAY_CHUNK_SIZE = 500000
+
+
+# Cheap emptiness test: the file has at least one row after the header
+def has_rows(path):
+    if not os.path.exists(path):
+        return False
+    with open(path, "rb") as f:
+        f.readline()
+        return bool(f.readline().strip())
+
+
+# Ledger row for an execution.Fill, with the running cash and shares after it
+def fill_to_row(fill):
+    order = fill.order
+    return {
+        "Date": order.date,
+        "Type": order.side,
+        "Stock Symbol": order.symbol,
+        "Shares": order.shares,
+        "Price per Share": order.price,
+        "Transaction Fee": fill.fee,
+        "Total Amount": fill.amount,
+        "Available Cash": fill.cash_after,
+        "Shares Owned": fill.shares_after,
+    }
+
+
+# Append-only transaction ledger with a checkpoint of cash, holdings and the byte offset it covers
+class Ledger:
+    def __init__(self, path, checkpoint_path=None, checkpoint_every=CHECKPOINT_EVERY):
+        self.path = path
+        self.checkpoint_path = checkpoint_path or os.path.splitext(path)[0] + ".checkpoint.json"
+        self.checkpoint_every = checkpoint_every
+        self.columns = list(LEDGER_COLUMNS)
+        self._reset()
+
+    def _reset(self):
+        self.cash = None  # cash after the last row, None while the ledger is empty
+        self.holdings = {}  # symbol -> shares owned, only symbols with shares > 0
+        self.row_count = 0
+        self.offset = 0  # bytes of the CSV already folded into the state above
+        self.header = None
+        self._rows_since_checkpoint = 0
+
+    def _read_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path) or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return False
+        # Ignore the checkpoint if the CSV was truncated or replaced since it was written
+        if os.path.getsize(self.path) < checkpoint["offset"]:
+            return False
+        with open(self.path, "rb") as f:
+            if f.readline().decode().rstrip("\r\n") != checkpoint["header"]:
+                return False
+        self.cash = checkpoint["cash"]
+        self.holdings = checkpoint["holdings"]
+        self.row_count = checkpoint["row_count"]
+        self.offset = checkpoint["offset"]
+        self.header = checkpoint["header"]
+        self.columns = self.header.split(",")
+        return True
+
+    def checkpoint(self):
+        checkpoint = {
+            "offset": self.offset,
+            "header": self.header,
+            "cash": self.cash,
+            "holdings": self.holdings,
+            "row_count": self.row_count,
+        }
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        self._rows_since_checkpoint = 0
+
+    def _apply(self, rows):
+        # Only the last row per symbol matters: it carries the running "Shares Owned"
+        if rows.empty:
+            return
+        self.cash = float(rows["Available Cash"].iloc[-1])
+        latest = rows.groupby("Stock Symbol", sort=False)["Shares Owned"].last()
+        for symbol, shares in latest.items():
+            if shares > 0:
+                self.holdings[symbol] = int(shares)
+            else:
+                self.holdings.pop(symbol, None)
+        self.row_count += len(rows)
+        self._rows_since_checkpoint += len(rows)
+
+    def load(self):
+        """Restore state from the checkpoint and replay only the rows appended after it."""
+        self._reset()
+        if not os.path.exists(self.path):
+            return self
+        self._read_checkpoint()
+
+        with open(self.path, "rb") as f:
+            self._replay(f)
+
+        if self._rows_since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+        return self
+
+    def _replay(self, f):
+        """Fold in the rows of the open file f from self.offset on, and move the offset past the last one read."""
+        if self.offset == 0:
+            self.header = f.readline().decode().rstrip("\r\n")
+            self.columns = self.header.split(",")
+            self.offset = f.tell()
+        f.seek(self.offset)
+        if f.read(1):
+            f.seek(self.offset)
+            chunks = pd.read_csv(
+                f,
+                header=None,
+                names=self.columns,
+                usecols=["Stock Symbol", "Available Cash", "Shares Owned"],
+                chunksize=REPLAY_CHUNK_SIZE,
+            )
+            for chunk in chunks:
+                self._apply(chunk)
+        # Where reading stopped, not the file size: rows appended since are picked up next time
+        self.offset = f.tell()
+
+    def append(self, transaction):
+        """Append one transaction row and fold it into the running state."""
+        self.append_many(pd.DataFrame([transaction]))
+
+    def append_many(self, transactions):
+        new_file = not os.path.exists(self.path)
+        data = transactions.to_csv(header=new_file, index=False).encode()
+        with open(self.path, "ab") as f:
+            f.write(data)
+            end = f.tell()
+        if new_file:
+            self.header = ",".join(transactions.columns)
+            self.columns = list(transactions.columns)
+        if end - len(data) == self.offset:
+            # Nothing else was written since our last read, so these rows are all that is new
+            self._apply(transactions)
+            self.offset = end
+        else:
+            # Another writer appended rows first; replay them along with ours, in file order
+            with open(self.path, "rb") as f:
+                self._replay(f)
+        if self._rows_since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def tail(self, n):
+        """Return the last n rows without reading the whole file."""
+        if not os.path.exists(self.path) or n <= 0:
+            return pd.DataFrame(columns=self.columns)
+        with open(self.path, "rb") as f:
+            header_end = len(f.readline())
+            pos = f.seek(0, os.SEEK_END)
+            data = b""
+            while pos > header_end and data.count(b"\n") <= n:
+                step = min(65536, pos - header_end)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+        lines = data.splitlines()[-n:]
+        if not lines:
+            return pd.DataFrame(columns=self.columns)
+        return pd.read_csv(io.BytesIO(b"\n".join(lines)), header=None, names=self.columns)
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from execution import BUY, SELL, Order, PositionBook, TradeError
+from fees import PAPER_TRADING_FEE
+from price_store import PriceProvider
+
+# Simulated seconds that pass per real second
+SIMULATION_SPEEDS = {
+    "Real time": 1,
+    "1 minute per second": 60,
+    "1 hour per second": 60 * 60,
+    "1 day per second": 24 * 60 * 60,
+}
+DEFAULT_SPEED = 60 * 60
+
+
+# Replays the bars a PriceStore already holds on disk, entirely offline; symbols it has no bars for
+# have no data
+class ReplayProvider(PriceProvider):
+    def __init__(self, store):
+        self.store = store
+
+    def fetch(self, symbol, start, end, interval="1d"):
+        bars = self.store.cached(symbol, interval)
+        if bars is None or bars.empty:
+            return None
+        return bars[(bars.index >= pd.Timestamp(start)) & (bars.index < pd.Timestamp(end))]
+
+
+# Market clock running over [start, end) at a chosen speed, looping back to start when it reaches the end,
+# and quoting each symbol from the provider's bar in effect at the current market time
+class SimulatedMarket:
+    def __init__(self, provider, start, end, interval="1d", speed=DEFAULT_SPEED, clock=time.monotonic):
+        self.provider = provider
+        self.start = pd.Timestamp(start)
+        self.end = pd.Timestamp(end)
+        self.interval = interval
+        self.speed = speed
+        self.clock = clock
+        self._origin = self.start  # market time when the clock was last (re)based
+        self._started = clock()
+        self._bars = {}  # symbol -> (bar times in ns, OHLCV columns as arrays), or None if no data
+        self._lock = threading.Lock()
+
+    def now(self):
+        elapsed = pd.Timedelta(seconds=(self.clock() - self._started) * self.speed)
+        span = self.end - self.start
+        return self.start + (self._origin - self.start + elapsed) % span
+
+    def set_speed(self, speed):
+        """Change speed without jumping: the market carries on from where it is now."""
+        self._origin = self.now()
+        self._started = self.clock()
+        self.speed = speed
+
+    def bars(self, symbol):
+        with self._lock:
+            if symbol not in self._bars:
+                data = self.provider.fetch(symbol, self.start, self.end, self.interval)
+                if data is None or data.empty:
+                    self._bars[symbol] = None
+                else:
+                    times = pd.DatetimeIndex(data.index).tz_localize(None).asi8
+                    columns = {column: data[column].to_numpy(dtype=float) for column in ("Open", "High", "Low", "Close", "Volume")}
+                    self._bars[symbol] = (times, columns)
+            return self._bars[symbol]
+
+    def closes(self, symbol, at=None):
+        """Closes of the bars up to market time (now by default), oldest first; None if no data."""
+        bars = self.bars(symbol)
+        if bars is None:
+            return None
+        times, columns = bars
+        at = self.now() if at is None else pd.Timestamp(at)
+        return columns["Close"][:int(np.searchsorted(times, at.value, side="right"))]
+
+    def quote(self, symbol, at=None):
+        """Same dict as papertrading's get_stock_data, for the bar in effect at market time (now by default)."""
+        bars = self.bars(symbol)
+        if bars is None:
+            return None
+        times, columns = bars
+        at = self.now() if at is None else pd.Timestamp(at)
+        i = max(int(np.searchsorted(times, at.value, side="right")) - 1, 0)
+        return {
+            "symbol": symbol,
+            "name": symbol,
+            "current_price": columns["Close"][i],
+            "volume": int(columns["Volume"][i]),
+            "open": columns["Open"][i],
+            "high": columns["High"][i],
+            "low": columns["Low"][i],
+        }
+
+    def prices(self, symbols):
+        """Current price per symbol as a Series, like the refresher snapshot's current_price; symbols without data are left out."""
+        quotes = {symbol: self.quote(symbol) for symbol in symbols}
+        return pd.Series({symbol: q["current_price"] for symbol, q in quotes.items() if q is not None}, dtype=float)
+
+
+def simulate_orders(market, symbols, count, seed=0, max_shares=10):
+    """count random buy/sell orders, each priced at the close of a random bar of a random symbol."""
+    rng = np.random.default_rng(seed)
+    symbols = [symbol for symbol in symbols if market.bars(symbol) is not None]
+    if not symbols:
+        return []
+    picks = rng.integers(0, len(symbols), count)
+    sides = np.where(rng.random(count) < 0.6, BUY, SELL)
+    shares = rng.integers(1, max_shares + 1, count)
+    orders = []
+    for pick, side, quantity, u in zip(picks, sides, shares, rng.random(count)):
+        times, columns = market.bars(symbols[pick])
+        bar = int(u * len(times))
+        date = pd.Timestamp(times[bar]).strftime("%Y-%m-%d %H:%M:%S")
+        orders.append(Order(side, symbols[pick], int(quantity), columns["Close"][bar], date))
+    return orders
+
+
+def run_load_test(market, symbols, count, cash=1e9, fee_model=PAPER_TRADING_FEE, store=None, seed=0):
+    """Push count simulated orders through PositionBook.execute, and through store.record_fill if given."""
+    orders = simulate_orders(market, symbols, count, seed)
+    book = PositionBook(cash, fee_model)
+    started = time.perf_counter()
+    fills, rejected = book.execute(orders)
+    store_rejected = 0
+    if store is not None:
+        for fill in fills:
+            try:
+                store.record_fill(fill)
+            except TradeError:
+                store_rejected += 1  # the store started with less cash or other positions than the book
+    seconds = time.perf_counter() - started
+    return {
+        "orders": len(orders),
+        "fills": len(fills),
+        "rejected": len(rejected),
+        "store_rejected": store_rejected,
+        "seconds": seconds,
+        "orders_per_second": len(orders) / seconds if seconds else float("inf"),
+    }
@@ -1,9 +1,21 @@
 import streamlit as st
 import yfinance as yf
 import pandas as pd
-import os
 import datetime
 import base64
+import uuid
+from quote_cache import QuoteCache
+from portfolio_store import PortfolioStore
+from execution import BUY, SELL, Order, PositionBook, TradeError
+from fees import PAPER_TRADING_FEE
+from valuation import value_portfolio
+from symbols import SymbolIndex
+from price_refresher import PriceRefresher
+from instrumentation import begin_page, end_page, fragment_run, stop_page, timed, timer, count
+from accounts import DEFAULT_ACCOUNT, AccountRegistry, account_path, is_valid_account_id, migrate_legacy
+from price_store import PriceStore, RandomWalkProvider
+from market_sim import SIMULATION_SPEEDS, DEFAULT_SPEED, ReplayProvider, SimulatedMarket
+from risk import RiskEngine, RiskLimits
 
 # Page Configuration
 st.set_page_config(page_title="Stock Lookup & Paper Trading", page_icon="📈", layout="wide")
@@ -11,6 +23,9 @@ st.set_page_config(page_title="Stock Lookup & Paper Trading", page_icon="📈",
 # Title and Header
 st.title("📊 Real-Time Stock Lookup & Paper Trading")
 
+# Optional per-run timing panel in the sidebar
+begin_page("papertrading")
+
 # Function to load the image and convert it to base64
 def get_base64_of_bin_file(bin_file):
     with open(bin_file, 'rb') as f:
@@ -21,7 +36,8 @@ def get_base64_of_bin_file(bin_file):
 qr_code_path = "qrcode.png"  # Ensure the image is in your app directory
 
 # Convert image to base64
-qr_code_base64 = get_base64_of_bin_file(qr_code_path)
+with timer("read_qr_code"):
+    qr_code_base64 = get_base64_of_bin_file(qr_code_path)
 
 # Custom CSS to position the QR code close to the top-right corner under the "Deploy" area
 st.markdown(
@@ -41,58 +57,115 @@ st.markdown(
 )
 
 
-# Portfolio CSV File
+# Portfolio database file inside each account's directory, and the legacy CSV the default account is seeded from
+PORTFOLIO_DB = "portfolio.db"
 PORTFOLIO_FILE = "portfolio.csv"
 
+# Account this session trades in; every account has its own database under accounts/<id>/
+account_id = st.sidebar.text_input("Account", value=DEFAULT_ACCOUNT, key="account_id").strip()
+if not is_valid_account_id(account_id):
+    st.sidebar.error("Account names may only contain letters, digits, '-' and '_'.")
+    stop_page()
+
 # Initialize Session State
 if 'portfolio' not in st.session_state:
     st.session_state.portfolio = pd.DataFrame(columns=["Symbol", "Shares", "Purchase Price"])
 if 'balance' not in st.session_state:
     st.session_state.balance = 100000  # Default balance if no file exists
 
-# Load Portfolio and Balance from CSV
+# Open an account's store for one price source; the default account's live store takes over the
+# database from before accounts existed
+def open_portfolio_store(key):
+    account_id, market_mode = key
+    if market_mode in SIMULATED_PORTFOLIO_DBS:
+        return PortfolioStore(account_path(account_id, SIMULATED_PORTFOLIO_DBS[market_mode]), initial_balance=100000)
+    path = account_path(account_id, PORTFOLIO_DB)
+    legacy_csv = None
+    if account_id == DEFAULT_ACCOUNT:
+        migrate_legacy(path, PORTFOLIO_DB)
+        legacy_csv = PORTFOLIO_FILE
+    return PortfolioStore(path, initial_balance=100000, legacy_csv=legacy_csv)
+
+# Stores opened on first use and closed again once their account has been idle for a while
+@st.cache_resource
+def get_portfolio_stores():
+    return AccountRegistry(open_portfolio_store)
+
+# The active account's store for the active price source; sessions on the same account share it,
+# and trades are serialized by SQLite
+def get_portfolio_store():
+    return get_portfolio_stores().get((account_id, market_mode))
+
+# Load Portfolio and Balance from the store
+@timed("load_portfolio")
 def load_portfolio_and_balance():
-    if os.path.exists(PORTFOLIO_FILE):
-        data = pd.read_csv(PORTFOLIO_FILE)
-        if "Balance" in data.columns:
-            balance = data["Balance"].iloc[0]
-            portfolio = data.drop(columns=["Balance"])
-            return portfolio, balance
-    return pd.DataFrame(columns=["Symbol", "Shares", "Purchase Price"]), 100000
-
-# Save Portfolio and Balance to CSV
-def save_portfolio_and_balance(portfolio, balance):
-    portfolio["Balance"] = [balance] + [None] * (len(portfolio) - 1)
-    portfolio.to_csv(PORTFOLIO_FILE, index=False)
-
-# Function to Fetch Stock Data
-def get_stock_data(symbol):
+    return get_portfolio_store().load()
+
+# Quote cache settings: how long a quote stays fresh and how many symbols are kept
+QUOTE_TTL = 30  # seconds
+QUOTE_CACHE_SIZE = 512
+
+# Function to Fetch Stock Data from Yahoo Finance (uncached)
+@timed("fetch_stock_data")
+def fetch_stock_data(symbol):
     """Get latest stock data including price and basic info."""
+    ticker = yf.Ticker(symbol)
+    df = ticker.history(period='1d')
+    if df.empty:
+        return None
+    current_price = df['Close'].iloc[-1]
+    info = {
+        'symbol': symbol,
+        'current_price': current_price,
+        'volume': df['Volume'].iloc[-1],
+        'open': df['Open'].iloc[-1],
+        'high': df['High'].iloc[-1],
+        'low': df['Low'].iloc[-1]
+    }
+    try:
+        info['name'] = ticker.info.get('longName', symbol)
+    except:
+        info['name'] = symbol
+    return info
+
+# One quote cache shared by every session of this app
+@st.cache_resource
+def get_quote_cache():
+    return QuoteCache(fetch_stock_data, ttl=QUOTE_TTL, maxsize=QUOTE_CACHE_SIZE)
+
+# Function to Fetch Stock Data through the shared cache, or from this session's simulated market
+@timed("get_stock_data")
+def get_stock_data(symbol):
+    market = st.session_state.get("market")
     try:
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period='1d')
-        if df.empty:
-            return None
-        current_price = df['Close'].iloc[-1]
-        info = {
-            'symbol': symbol,
-            'current_price': current_price,
-            'volume': df['Volume'].iloc[-1],
-            'open': df['Open'].iloc[-1],
-            'high': df['High'].iloc[-1],
-            'low': df['Low'].iloc[-1]
-        }
-        try:
-            info['name'] = ticker.info.get('longName', symbol)
-        except:
-            info['name'] = symbol
-        return info
+        if market is not None:
+            return market.quote(symbol)
+        return get_quote_cache().get(symbol)
     except Exception as e:
         st.error(f"Error fetching data for {symbol}: {str(e)}")
         return None
 
-# Load portfolio and balance at start
-st.session_state.portfolio, st.session_state.balance = load_portfolio_and_balance()
+# Symbol master loaded once per server process
+@st.cache_resource
+def get_symbol_index():
+    return SymbolIndex.load()
+
+# Local price history (shared with stocks.py), replayed by the simulated market
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+# Background quote poller shared by all sessions, and how long a page waits on it for newly held symbols
+PRICE_REFRESH_SECONDS = 15
+PRICE_WAIT_SECONDS = 10
+
+@st.cache_resource
+def get_price_refresher():
+    return PriceRefresher(interval=PRICE_REFRESH_SECONDS).start()
+
+# Identifies this browser session to the price refresher
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 
 st.markdown("""
@@ -102,7 +175,130 @@ Start with a virtual balance of **$100,000**, and build your portfolio!
 
 # Sidebar Input for Stock Symbol
 st.sidebar.header("Stock Lookup")
-symbol = st.sidebar.text_input("Enter Stock Symbol (e.g., AAPL, MSFT, GOOGL)", "").upper()
+symbol = st.sidebar.text_input("Enter Stock Symbol (e.g., AAPL, MSFT, GOOGL)", "").upper().strip()
+
+# Name of a symbol missing from the symbol master, from a live quote (None if there is none)
+def lookup_symbol(symbol):
+    quote = get_quote_cache().get(symbol)
+    return quote["name"] if quote else None
+
+# Check symbols against the local symbol master; ones it does not list get a single quote lookup.
+# A failed lookup is not remembered, so the symbol is tried again on the next run.
+symbol_index = get_symbol_index()
+try:
+    known = symbol_index.check(symbol, lookup_symbol) if symbol else True
+except Exception as e:
+    st.sidebar.error(f"Error looking up {symbol}: {str(e)}")
+    known = True
+    symbol = ""
+if not known:
+    st.sidebar.error(f"Unknown symbol: {symbol}")
+    suggestions = symbol_index.search(symbol, limit=5)
+    if suggestions:
+        st.sidebar.write("Did you mean: " + ", ".join(f"{s} ({symbol_index.name(s)})" for s in suggestions))
+    symbol = ""
+
+# Market data: live quotes, or a simulated feed for offline demos, training sessions and load tests
+MARKET_MODES = ["Live", "Replay stored history", "Random walk"]
+SIMULATION_DAYS = 365  # length of the simulated window, which loops when the clock reaches its end
+
+# Simulated prices are not market prices, so each simulated source trades a portfolio of its own
+# instead of the account's live paper book
+SIMULATED_PORTFOLIO_DBS = {
+    "Replay stored history": "portfolio.replay.db",
+    "Random walk": "portfolio.random_walk.db",
+}
+
+st.sidebar.header("Market Data")
+market_mode = st.sidebar.radio("Price Source", MARKET_MODES)
+if market_mode == "Live":
+    st.session_state.market = None
+else:
+    speed_label = st.sidebar.selectbox(
+        "Simulation Speed", list(SIMULATION_SPEEDS), index=list(SIMULATION_SPEEDS.values()).index(DEFAULT_SPEED)
+    )
+    speed = SIMULATION_SPEEDS[speed_label]
+    market = st.session_state.get("market")
+    if market is None or st.session_state.get("market_mode") != market_mode:
+        end = datetime.datetime.now()
+        start = end - datetime.timedelta(days=SIMULATION_DAYS)
+        provider = ReplayProvider(get_price_store()) if market_mode == "Replay stored history" else RandomWalkProvider()
+        market = st.session_state.market = SimulatedMarket(provider, start, end, speed=speed)
+        st.session_state.market_mode = market_mode
+    elif market.speed != speed:
+        market.set_speed(speed)
+    st.sidebar.caption(f"Simulated market time: {market.now():%Y-%m-%d %H:%M}")
+    st.sidebar.caption("Trades in this mode go to a separate simulated portfolio.")
+
+# Load portfolio and balance for the chosen account and price source
+st.session_state.portfolio, st.session_state.balance = load_portfolio_and_balance()
+
+# Pre-trade risk limits, checked on every order before it is filled
+with st.sidebar.expander("Risk Limits"):
+    max_position_weight = st.number_input("Max position weight (%)", min_value=1.0, max_value=100.0, value=25.0, step=1.0)
+    max_var = st.number_input("Max 1-day 95% VaR (% of equity)", min_value=0.1, max_value=100.0, value=5.0, step=0.5)
+risk_limits = RiskLimits(max_position_weight=max_position_weight / 100, max_var=max_var / 100)
+
+# Daily closes behind the risk engine's historical VaR: the simulated feed, or a year of the local
+# price store's history, loaded for all symbols at once
+RISK_HISTORY_DAYS = 365
+
+def load_closes(symbols):
+    market = st.session_state.get("market")
+    if market is not None:
+        # Only bars up to the market clock, so VaR never sees the simulated future
+        closes = {symbol: market.closes(symbol) for symbol in symbols}
+        return {symbol: close for symbol, close in closes.items() if close is not None}
+    end = datetime.datetime.now()
+    frames = get_price_store().history_many(symbols, end - datetime.timedelta(days=RISK_HISTORY_DAYS), end)
+    return {symbol: bars["Close"].to_numpy() for symbol, bars in frames.items() if not bars.empty}
+
+# This session's risk engine, if it still matches the account, price source and book on screen
+def current_risk_engine():
+    engine = st.session_state.get("risk_engine")
+    if engine is None or st.session_state.get("risk_engine_key") != (account_id, market_mode):
+        return None
+    portfolio = st.session_state.portfolio.dropna(subset=["Symbol"])
+    if engine.holdings() != dict(zip(portfolio["Symbol"], portfolio["Shares"])):
+        return None
+    if abs(engine.cash - st.session_state.balance) > 1e-6:
+        return None
+    return engine
+
+# Risk engine for an order; built on the first order and whenever the book changed elsewhere, then
+# updated fill by fill. The order's symbol is loaded in the same batch as the holdings.
+def get_risk_engine(symbol):
+    engine = current_risk_engine()
+    if engine is None:
+        with timer("build_risk_engine"):
+            portfolio = st.session_state.portfolio.dropna(subset=["Symbol"])
+            holdings = dict(zip(portfolio["Symbol"], portfolio["Shares"]))
+            closes = load_closes(list(holdings) + [symbol])
+            market = st.session_state.get("market")
+            prices = market.prices(holdings) if market is not None else get_price_refresher().snapshot.quotes["current_price"]
+            prices = {
+                held: prices.get(held, purchase_price)
+                for held, purchase_price in zip(portfolio["Symbol"], portfolio["Purchase Price"])
+            }
+            engine = RiskEngine.from_holdings(
+                st.session_state.balance,
+                holdings,
+                prices,
+                risk_limits,
+                lambda other: closes[other] if other in closes else load_closes([other]).get(other),
+            )
+        st.session_state.risk_engine = engine
+        st.session_state.risk_engine_key = (account_id, market_mode)
+    engine.limits = risk_limits
+    return engine
+
+# Quote cache counters, used to size QUOTE_TTL / QUOTE_CACHE_SIZE under real load
+with st.sidebar.expander("Quote cache stats"):
+    st.json(get_quote_cache().stats())
+
+# Open portfolio databases, loads and evictions, used to size the account registry
+with st.sidebar.expander("Account registry stats"):
+    st.json(get_portfolio_stores().stats())
 
 if symbol:
     with st.spinner(f'Fetching data for {symbol}...'):
@@ -121,6 +317,8 @@ if symbol:
                 st.metric("🔄 Volume", f"{stock_data['volume']:,}")
 
             st.markdown("---")
+        elif market_mode == "Replay stored history":
+            st.warning(f"No stored price history for {symbol}. Open it in the stock chart app once to replay it.")
 
            # Buy and Sell Sections in Columns
 st.subheader("📋 Paper Trading")
@@ -146,112 +344,121 @@ if symbol:
         stock_data = get_stock_data(symbol)
 
     if stock_data:  # Only proceed if stock data is available
-        # Buy Button Logic
-        if buy_button:
-            cost = buy_quantity * stock_data["current_price"]
-            transaction_fee = cost * 0.002  # 0.2% transaction fee
-            total_cost = cost + transaction_fee  # Total cost with fee
-            transaction_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Current date and time
-
-            if total_cost <= st.session_state.balance:
-                st.session_state.balance -= total_cost  # Deduct total cost with fee
-                existing = st.session_state.portfolio[
-                    st.session_state.portfolio["Symbol"] == symbol
-                ]
-                if not existing.empty:
-                    st.session_state.portfolio.loc[existing.index, "Shares"] += buy_quantity
-                    st.session_state.portfolio.loc[existing.index, "Transaction Fee"] += transaction_fee  # Add fee
-                    st.session_state.portfolio.loc[existing.index, "Transaction Date"] = transaction_date  # Add date
+        # Buy and Sell Button Logic
+        if buy_button or sell_button:
+            side, quantity = (BUY, buy_quantity) if buy_button else (SELL, sell_quantity)
+            # Simulated trades are stamped with the market clock rather than the wall clock
+            market = st.session_state.get("market")
+            trade_date = f"{market.now():%Y-%m-%d %H:%M:%S}" if market is not None else None
+            order = Order(side, symbol, quantity, stock_data["current_price"], trade_date)
+            book = PositionBook.from_portfolio(st.session_state.portfolio, st.session_state.balance, PAPER_TRADING_FEE)
+
+            try:
+                # Checked before the risk engine, which may have to load history for every holding
+                if quantity <= 0:
+                    raise TradeError("Quantity must be greater than zero.")
+                # Exposure, concentration and VaR limits; raises before anything is filled
+                engine = get_risk_engine(symbol)
+                with timer("risk_check"):
+                    engine.check(order)
+                # Price the trade (0.2% transaction fee) and check it against this session's view of the book
+                fill = book.execute_one(order)
+                # The database re-checks and applies it atomically, in case another session traded meanwhile
+                with timer("record_fill"):
+                    get_portfolio_store().record_fill(fill)
+                engine.apply(fill)
+                st.session_state.portfolio, st.session_state.balance = load_portfolio_and_balance()
+                if side == BUY:
+                    st.success(f"Bought {quantity} shares of {symbol} for ${fill.amount - fill.fee:.2f} (Fee: ${fill.fee:.2f}) on {order.date}")
                 else:
-                    st.session_state.portfolio = pd.concat(
-                        [
-                            st.session_state.portfolio,
-                            pd.DataFrame(
-                                {
-                                    "Symbol": [symbol],
-                                    "Shares": [buy_quantity],
-                                    "Purchase Price": [stock_data["current_price"]],
-                                    "Transaction Fee": [transaction_fee],  # Add fee to new row
-                                    "Transaction Date": [transaction_date],  # Add date to new row
-                                }
-                            ),
-                        ]
-                    )
-                save_portfolio_and_balance(st.session_state.portfolio, st.session_state.balance)
-                st.success(f"Bought {buy_quantity} shares of {symbol} for ${cost:.2f} (Fee: ${transaction_fee:.2f}) on {transaction_date}")
-            else:
-                st.error("Insufficient balance!")
-
-        # Sell Button Logic
-        if sell_button:
-            existing = st.session_state.portfolio[
-                st.session_state.portfolio["Symbol"] == symbol
-            ]
-            if not existing.empty and existing["Shares"].iloc[0] >= sell_quantity:
-                st.session_state.portfolio.loc[existing.index, "Shares"] -= sell_quantity
-                proceeds = sell_quantity * stock_data["current_price"]
-                transaction_fee = proceeds * 0.002  # 0.2% transaction fee
-                net_proceeds = proceeds - transaction_fee  # Net proceeds after fee
-                transaction_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Current date and time
-                st.session_state.balance += net_proceeds
-                st.session_state.portfolio.loc[existing.index, "Transaction Fee"] += transaction_fee  # Add fee
-                st.session_state.portfolio.loc[existing.index, "Transaction Date"] = transaction_date  # Add date
-                st.session_state.portfolio = st.session_state.portfolio[
-                    st.session_state.portfolio["Shares"] > 0
-                ]
-                save_portfolio_and_balance(st.session_state.portfolio, st.session_state.balance)
-                st.success(f"Sold {sell_quantity} shares of {symbol} for ${net_proceeds:.2f} (Fee: ${transaction_fee:.2f}) on {transaction_date}")
-            else:
-                st.error("Not enough shares to sell!")
+                    st.success(f"Sold {quantity} shares of {symbol} for ${fill.amount:.2f} (Fee: ${fill.fee:.2f}) on {order.date}")
+            except TradeError as e:
+                st.error(str(e))
 
         st.markdown("---")
 
+# Column labels and number formats for the portfolio table
+PORTFOLIO_COLUMN_CONFIG = {
+    "Symbol": st.column_config.TextColumn("Symbol"),
+    "Shares": st.column_config.NumberColumn("Shares", format="%.2f"),
+    "Purchase Price": st.column_config.NumberColumn("Average Cost", format="$%.2f"),
+    "Current Price": st.column_config.NumberColumn("Current Price", format="$%.2f"),
+    "Current Value": st.column_config.NumberColumn("Current Value", format="$%.2f"),
+    "Cost Basis": st.column_config.NumberColumn("Cost Basis", format="$%.2f"),
+    "Unrealized P&L": st.column_config.NumberColumn("Unrealized P&L", format="$%.2f"),
+    "Weight (%)": st.column_config.NumberColumn("Weight", format="%.2f%%"),
+    "Transaction Fee": st.column_config.NumberColumn("Total Transaction Fee", format="$%.2f"),
+    "Transaction Date": st.column_config.TextColumn("The Latest Transaction Date"),
+}
+
 # Portfolio Display Section
 st.subheader("📂 Portfolio")
-if not st.session_state.portfolio.empty:
+
+# Re-runs on its own every PRICE_REFRESH_SECONDS, reading the shared snapshot instead of fetching;
+# those reruns skip the rest of the page, so they are timed as runs of their own
+@st.experimental_fragment(run_every=PRICE_REFRESH_SECONDS)
+@fragment_run("papertrading.portfolio")
+def show_portfolio():
+    if st.session_state.portfolio.empty:
+        st.write("No shares in portfolio. Start trading to build your portfolio!")
+        return
+
     # Remove rows with NaN or invalid symbols from the portfolio
     valid_portfolio = st.session_state.portfolio.dropna(subset=["Symbol"])
+    held_symbols = set(valid_portfolio["Symbol"])
+
+    market = st.session_state.get("market")
+    if market is not None:
+        # Simulated mode prices everything from this session's market clock
+        prices = market.prices(held_symbols)
+        as_of = market.now()
+    else:
+        # Keep this session's subscription alive and read the latest published prices
+        refresher = get_price_refresher()
+        refresher.subscribe(st.session_state.session_id, held_symbols)
+        snapshot = refresher.snapshot
+        prices = snapshot.quotes["current_price"]
+        as_of = datetime.datetime.fromtimestamp(snapshot.updated_at) if snapshot.updated_at else None
+
+    # Symbols the refresher has not polled yet (e.g. just bought): wake it and wait for its next poll
+    missing = held_symbols - set(prices.index)
+    if missing and market is None:
+        count("prices_awaited", len(missing))
+        with timer("wait_for_prices"):
+            snapshot = refresher.wait_for(missing, PRICE_WAIT_SECONDS)
+        prices = snapshot.quotes["current_price"]
+        as_of = datetime.datetime.fromtimestamp(snapshot.updated_at) if snapshot.updated_at else None
+        if refresher.last_error is not None:
+            st.error(f"Error fetching portfolio prices: {str(refresher.last_error)}")
+
+    # Market value, cost basis, P&L and weights computed as whole-column operations
+    with timer("value_portfolio"):
+        valid_portfolio = value_portfolio(valid_portfolio, prices)
+
+    # Show the portfolio; rounding and labels are applied by the display layer, not per cell
+    with timer("render_portfolio"):
+        st.dataframe(
+            valid_portfolio,
+            column_config=PORTFOLIO_COLUMN_CONFIG,
+            column_order=list(PORTFOLIO_COLUMN_CONFIG),
+            hide_index=True,
+            use_container_width=True,
+        )
+    if as_of is not None:
+        st.caption(f"Prices as of {as_of:%Y-%m-%d %H:%M:%S}")
+
+show_portfolio()
 
-    # Drop the "Balance" column before displaying the portfolio table
-    valid_portfolio = valid_portfolio.drop(columns=["Balance"], errors="ignore")
-
-    # Rename the columns as needed (make sure this happens first)
-    valid_portfolio = valid_portfolio.rename(columns={
-        "Transaction Date": "The Latest Transaction Date",  # Renaming "Transaction Date" column
-        "Purchase Price": "The Latest Purchase Price",     # Renaming "Purchase Price" column
-        "Transaction Fee": "Total Transaction Fee"         # Renaming "Transaction Fee" column
-    })
-    
-    # Add a check to ensure stock data is available before calculating current value
-    def get_current_value(symbol, shares):
-        if pd.isna(symbol):  # Skip invalid symbols
-            return 0
-        stock_data = get_stock_data(symbol)
-        if stock_data:
-            return round(shares * stock_data['current_price'], 2)  # Round to 2 decimals
-        else:
-            return 0  # Return 0 if stock data is unavailable
+st.write(f"💰 **Updated Balance**: **${st.session_state.balance:,.2f}**")
 
-    # Apply the current value calculation to the valid portfolio
-    valid_portfolio['Current Value'] = valid_portfolio.apply(
-        lambda row: get_current_value(row['Symbol'], row['Shares']), axis=1
+# Book-level risk as the engine last saw it (positions marked at their last traded or polled price);
+# shown once this session has traded, without building an engine just for the caption
+risk_engine = current_risk_engine()
+if risk_engine is not None and not st.session_state.portfolio.empty:
+    risk = risk_engine.metrics()
+    st.caption(
+        f"Risk: 1-day 95% VaR ${risk['var']:,.2f} ({risk['var_pct']:.2%} of equity), "
+        f"largest position {risk['largest_position']} at {risk['largest_weight']:.1%} of equity"
     )
-    
-     # Round all relevant columns to 2 decimal points to ensure correct display
-    valid_portfolio["The Latest Purchase Price"] = valid_portfolio["The Latest Purchase Price"].round(2)
-    valid_portfolio["Total Transaction Fee"] = valid_portfolio["Total Transaction Fee"].round(2)
-    valid_portfolio["Current Value"] = valid_portfolio["Current Value"].round(2)
-    valid_portfolio["Shares"] = valid_portfolio["Shares"].round(2)
-
-    # Ensure that figures are displayed with 2 decimal places using string formatting
-    valid_portfolio["The Latest Purchase Price"] = valid_portfolio["The Latest Purchase Price"].apply(lambda x: f"{x:.2f}")
-    valid_portfolio["Total Transaction Fee"] = valid_portfolio["Total Transaction Fee"].apply(lambda x: f"{x:.2f}")
-    valid_portfolio["Current Value"] = valid_portfolio["Current Value"].apply(lambda x: f"{x:.2f}")
-    valid_portfolio["Shares"] = valid_portfolio["Shares"].apply(lambda x: f"{x:.2f}")
-
-    # Show the portfolio with the updated column names
-    st.table(valid_portfolio)
-else:
-    st.write("No shares in portfolio. Start trading to build your portfolio!")
 
-st.write(f"💰 **Updated Balance**: **${st.session_state.balance:,.2f}**")
+end_page()
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from execution import BUY, TradeError
+
+PORTFOLIO_DB = "portfolio.db"
+DEFAULT_BALANCE = 100000
+
+PORTFOLIO_COLUMNS = ["Symbol", "Shares", "Purchase Price", "Transaction Fee", "Transaction Date"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS account (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    balance REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    symbol TEXT PRIMARY KEY,
+    shares REAL NOT NULL,
+    purchase_price REAL NOT NULL,
+    transaction_fee REAL NOT NULL DEFAULT 0,
+    transaction_date TEXT
+);
+"""
+
+
+# Cash balance and positions in an embedded SQLite database (WAL mode), one small write per trade
+class PortfolioStore:
+    def __init__(self, path=PORTFOLIO_DB, initial_balance=DEFAULT_BALANCE, legacy_csv=None):
+        self.path = path
+        self._local = threading.local()  # one connection per thread
+        self._connect().executescript(SCHEMA)
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM account").fetchone() is None:
+                self._initialize(conn, initial_balance, legacy_csv)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    def _initialize(self, conn, initial_balance, legacy_csv):
+        # Import the old portfolio.csv once, where the balance lived in a sparse "Balance" column
+        balance = initial_balance
+        if legacy_csv and os.path.exists(legacy_csv):
+            data = pd.read_csv(legacy_csv)
+            if "Balance" in data.columns and data["Balance"].notna().any():
+                balance = float(data["Balance"].dropna().iloc[0])
+            positions = data.dropna(subset=["Symbol"])
+            positions = positions[positions["Shares"] > 0].reindex(columns=PORTFOLIO_COLUMNS)
+            positions["Transaction Fee"] = positions["Transaction Fee"].fillna(0)
+            positions = positions.astype(object).where(positions.notna(), None)
+            conn.executemany(
+                "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?)",
+                positions.itertuples(index=False, name=None),
+            )
+        conn.execute("INSERT INTO account (id, balance) VALUES (1, ?)", (balance,))
+
+    def load(self):
+        """Return (portfolio DataFrame, cash balance)."""
+        conn = self._connect()
+        balance = conn.execute("SELECT balance FROM account WHERE id = 1").fetchone()[0]
+        rows = conn.execute(
+            "SELECT symbol, shares, purchase_price, transaction_fee, transaction_date FROM positions ORDER BY rowid"
+        ).fetchall()
+        return pd.DataFrame(rows, columns=PORTFOLIO_COLUMNS), balance
+
+    def buy(self, symbol, shares, price, fee, date):
+        """Atomically debit cash and add to the position at its average cost; returns the new balance."""
+        total_cost = shares * price + fee
+        with self._transaction() as conn:
+            balance = conn.execute("SELECT balance FROM account WHERE id = 1").fetchone()[0]
+            if total_cost > balance:
+                raise TradeError("Insufficient balance!")
+            conn.execute(
+                """
+                INSERT INTO positions (symbol, shares, purchase_price, transaction_fee, transaction_date)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(symbol) DO UPDATE SET
+                    purchase_price = (shares * purchase_price + excluded.shares * excluded.purchase_price)
+                                     / (shares + excluded.shares),
+                    shares = shares + excluded.shares,
+                    transaction_fee = transaction_fee + excluded.transaction_fee,
+                    transaction_date = excluded.transaction_date
+                """,
+                (symbol, shares, price, fee, date),
+            )
+            conn.execute("UPDATE account SET balance = ? WHERE id = 1", (balance - total_cost,))
+        return balance - total_cost
+
+    def sell(self, symbol, shares, price, fee, date):
+        """Atomically reduce the position and credit cash; returns the new balance."""
+        net_proceeds = shares * price - fee
+        with self._transaction() as conn:
+            row = conn.execute("SELECT shares FROM positions WHERE symbol = ?", (symbol,)).fetchone()
+            if row is None or row[0] < shares:
+                raise TradeError("Not enough shares to sell!")
+            if row[0] == shares:
+                conn.execute("DELETE FROM positions WHERE symbol = ?", (symbol,))
+            else:
+                conn.execute(
+                    """
+                    UPDATE positions
+                    SET shares = shares - ?, transaction_fee = transaction_fee + ?, transaction_date = ?
+                    WHERE symbol = ?
+                    """,
+                    (shares, fee, date, symbol),
+                )
+            balance = conn.execute("SELECT balance FROM account WHERE id = 1").fetchone()[0]
+            conn.execute("UPDATE account SET balance = ? WHERE id = 1", (balance + net_proceeds,))
+        return balance + net_proceeds
+
+    def record_fill(self, fill):
+        """Persist a Fill produced by an execution.PositionBook; returns the new balance."""
+        order = fill.order
+        record = self.buy if order.side == BUY else self.sell
+        return record(order.symbol, order.shares, order.price, fill.fee, order.date)
+
+
+# BEGIN IMMEDIATE takes the write lock up front so concurrent trades serialize instead of racing
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import namedtuple
+
+from quotes import get_quotes
+
+# Latest quotes for every subscribed symbol, replaced as a whole on each refresh
+Snapshot = namedtuple("Snapshot", ["quotes", "updated_at"])
+
+REFRESH_INTERVAL = 15  # seconds between polls
+IDLE_TIMEOUT = 5 * 60  # drop a session's subscription if it has not checked in for this long
+
+
+# One background thread polling quotes for the union of all sessions' symbols
+class PriceRefresher:
+    def __init__(self, fetch_quotes=get_quotes, interval=REFRESH_INTERVAL, idle_timeout=IDLE_TIMEOUT):
+        self.fetch_quotes = fetch_quotes
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self._subscriptions = {}  # session id -> (symbols, last seen)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.snapshot = Snapshot(fetch_quotes([]), 0.0)
+        self.last_error = None
+        self._refreshed = threading.Condition()  # notified after every poll
+        self._polls_started = 0
+        self._polls_finished = 0
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="price-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def subscribe(self, session_id, symbols):
+        """Register (or refresh) the symbols a session wants; new symbols trigger an early poll."""
+        symbols = frozenset(symbols)
+        with self._lock:
+            previous = self._subscriptions.get(session_id, (frozenset(), 0))[0]
+            self._subscriptions[session_id] = (symbols, time.time())
+        if symbols - previous - set(self.snapshot.quotes.index):
+            self._wake.set()
+
+    def unsubscribe(self, session_id):
+        with self._lock:
+            self._subscriptions.pop(session_id, None)
+
+    def symbols(self):
+        """Union of symbols across sessions that are still active."""
+        cutoff = time.time() - self.idle_timeout
+        with self._lock:
+            for session_id in [s for s, (_, seen) in self._subscriptions.items() if seen < cutoff]:
+                del self._subscriptions[session_id]
+            return set().union(*(symbols for symbols, _ in self._subscriptions.values()))
+
+    def refresh(self):
+        with self._refreshed:
+            self._polls_started += 1
+        try:
+            symbols = self.symbols()
+            if symbols:
+                # Swapping in a new Snapshot is atomic, so readers never see a half-updated set
+                self.snapshot = Snapshot(self.fetch_quotes(symbols), time.time())
+                self.last_error = None
+        except Exception as e:
+            self.last_error = e
+        finally:
+            with self._refreshed:
+                self._polls_finished += 1
+                self._refreshed.notify_all()
+
+    def wait_for(self, symbols, timeout):
+        """Wake the poller and wait for a poll that started after this call, or until every symbol is quoted.
+
+        Sessions wait on the poller instead of fetching themselves, because the batched quote download is
+        not safe to run from several threads at once. Returns the latest snapshot, which may still lack
+        symbols the provider does not know or if timeout passes first.
+        """
+        symbols = set(symbols)
+        deadline = time.monotonic() + timeout
+        with self._refreshed:
+            target = self._polls_started + 1
+            self._wake.set()
+            while symbols - set(self.snapshot.quotes.index) and self._polls_finished < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._refreshed.wait(remaining):
+                    break
+        return self.snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._wake.wait(self.interval)
+            self._wake.clear()
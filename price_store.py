@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# Directory holding one Parquet file of OHLCV bars per ticker and bar interval
+PRICE_CACHE_DIR = "price_cache"
+
+# How long cached daily history is considered fresh before asking the provider for the tail again
+REFRESH_INTERVAL = 15 * 60  # seconds
+
+# Intraday bars go stale much faster
+INTRADAY_REFRESH_INTERVAL = 60  # seconds
+
+# How far back Yahoo Finance serves each intraday interval
+INTRADAY_MAX_DAYS = {
+    "1m": 7,
+    "5m": 60,
+    "15m": 60,
+    "30m": 60,
+    "1h": 730,
+}
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+# Concurrent provider requests when loading many symbols at once
+MAX_FETCH_WORKERS = 16
+
+
+# Base class for anything that can supply OHLCV history for a symbol
+class PriceProvider:
+    def fetch(self, symbol, start, end, interval="1d"):
+        """Return a DataFrame of OHLCV bars indexed by date for [start, end)."""
+        raise NotImplementedError
+
+
+# Live data from Yahoo Finance. Ticker.history rather than yf.download, which keeps its results
+# in module-level state and is not safe to call from several threads at once
+class YahooProvider(PriceProvider):
+    def fetch(self, symbol, start, end, interval="1d"):
+        data = yf.Ticker(symbol).history(start=start, end=end, interval=interval, auto_adjust=False, actions=False)
+        return data.reindex(columns=OHLCV_COLUMNS) if not data.empty else data
+
+
+# Offline data read from <directory>/<SYMBOL>.csv (or <SYMBOL>_<interval>.csv), e.g. for demos and tests
+class FixtureProvider(PriceProvider):
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, symbol, start, end, interval="1d"):
+        name = symbol if interval == "1d" else f"{symbol}_{interval}"
+        path = os.path.join(self.directory, f"{name}.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        data = pd.read_csv(path, index_col=0, parse_dates=True)
+        return data[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+
+
+# Deterministic synthetic bars (a random walk seeded by the symbol), for offline runs and benchmarks
+class RandomWalkProvider(PriceProvider):
+    FREQUENCIES = {"1d": "B", "1h": "H", "30m": "30min", "15m": "15min", "5m": "5min", "1m": "min"}
+
+    def __init__(self, start_price=100.0, volatility=0.02):
+        self.start_price = start_price
+        self.volatility = volatility
+
+    def fetch(self, symbol, start, end, interval="1d"):
+        index = pd.date_range(pd.Timestamp(start), pd.Timestamp(end), freq=self.FREQUENCIES[interval], inclusive="left")
+        if len(index) == 0:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        # Seeded from the symbol and the first bar, so repeating a request returns the same bars
+        rng = np.random.default_rng([sum(map(ord, symbol)), index[0].toordinal(), index[0].hour * 60 + index[0].minute])
+        close = self.start_price * np.exp(np.cumsum(rng.normal(0, self.volatility, len(index))))
+        spread = close * self.volatility * rng.random(len(index))
+        data = pd.DataFrame(
+            {
+                "Open": close - spread * (rng.random(len(index)) - 0.5),
+                "High": close + spread,
+                "Low": close - spread,
+                "Close": close,
+                "Adj Close": close,
+                "Volume": rng.integers(1e5, 1e7, len(index)),
+            },
+            index=index,
+        )
+        data.index.name = "Date"
+        return data
+
+
+# Persistent per-ticker price history that only fetches the bars it does not have yet
+class PriceStore:
+    def __init__(self, provider=None, directory=PRICE_CACHE_DIR, refresh_interval=REFRESH_INTERVAL):
+        self.provider = provider or YahooProvider()
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        self._frames = {}  # in-memory copy of each file, keyed by (symbol, interval)
+        self._locks = {}  # one lock per (symbol, interval), so different symbols load in parallel
+        self._locks_lock = threading.Lock()
+        self._requested_from = {}  # earliest start already asked of the provider, keyed by (symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+
+    def _lock(self, symbol, interval):
+        with self._locks_lock:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def _path(self, symbol, interval="1d"):
+        name = symbol if interval == "1d" else f"{symbol}_{interval}"
+        return os.path.join(self.directory, f"{name}.parquet")
+
+    def _read(self, symbol, interval="1d"):
+        key = (symbol, interval)
+        if key not in self._frames:
+            path = self._path(symbol, interval)
+            if os.path.exists(path):
+                self._frames[key] = pd.read_parquet(path)
+            else:
+                self._frames[key] = None
+        return self._frames[key]
+
+    def _write(self, symbol, data, interval="1d"):
+        # Write to a temporary file first so a crash never leaves a half-written cache
+        path = self._path(symbol, interval)
+        tmp_path = path + ".tmp"
+        data.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        self._frames[(symbol, interval)] = data
+
+    def _is_fresh(self, symbol, interval="1d"):
+        path = self._path(symbol, interval)
+        max_age = self.refresh_interval if interval == "1d" else INTRADAY_REFRESH_INTERVAL
+        return os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age
+
+    def _fetch(self, symbol, start, end, interval="1d"):
+        data = self.provider.fetch(symbol, start, end, interval)
+        if data is None or data.empty:
+            return None
+        data.index = pd.DatetimeIndex(data.index).tz_localize(None)
+        return data
+
+    def history(self, symbol, start, end, interval="1d"):
+        """Return OHLCV bars for symbol between start and end, fetching only what is missing."""
+        with self._lock(symbol, interval):
+            return self._history(symbol, start, end, interval)
+
+    def history_many(self, symbols, start, end, interval="1d", max_workers=MAX_FETCH_WORKERS):
+        """history() for several symbols on a thread pool; returns {symbol: bars}, in the order given."""
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as pool:
+            frames = pool.map(lambda symbol: self.history(symbol, start, end, interval), symbols)
+            return dict(zip(symbols, frames))
+
+    def _history(self, symbol, start, end, interval="1d"):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if interval == "1d":
+            start = start.normalize()
+        else:
+            # Yahoo only serves a limited window of intraday bars
+            start = max(start, end - timedelta(days=INTRADAY_MAX_DAYS.get(interval, 60) - 1))
+        cached = self._read(symbol, interval)
+
+        key = (symbol, interval)
+        if cached is None or cached.empty:
+            fetched = self._fetch(symbol, start, end, interval)
+            self._requested_from[key] = start
+            if fetched is None:
+                return pd.DataFrame(columns=OHLCV_COLUMNS)
+            self._write(symbol, fetched, interval)
+            return fetched
+
+        parts = [cached]
+        first, last = cached.index[0], cached.index[-1]
+        stale = not self._is_fresh(symbol, interval)
+        # Older history than we have on disk, however fresh the file is; asked for once per start date,
+        # since a symbol that listed after start has nothing older to give
+        if start < first and start < self._requested_from.get(key, first):
+            head = self._fetch(symbol, start, first, interval)
+            self._requested_from[key] = start
+            if head is not None:
+                parts.insert(0, head)
+        # The tail since the last stored bar; the last bar is refetched because it may have been partial
+        if stale and end > last:
+            tail = self._fetch(symbol, last, end, interval)
+            if tail is not None:
+                parts.append(tail)
+
+        if len(parts) > 1:
+            merged = pd.concat(parts)
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            self._write(symbol, merged, interval)
+        elif stale:
+            # Nothing new upstream; touch the file so we do not ask again until the next interval
+            os.utime(self._path(symbol, interval))
+        data = self._frames[key]
+        return data[(data.index >= start) & (data.index < end)]
+
+    def cached(self, symbol, interval="1d"):
+        """The full history held for symbol, or None if nothing is cached yet."""
+        return self._read(symbol, interval)
+
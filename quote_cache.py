@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+# Process-wide TTL + LRU cache; concurrent lookups of the same key share one in-flight fetch
+class QuoteCache:
+    def __init__(self, fetch, ttl=30, maxsize=512):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._inflight = {}  # key -> Future shared by every caller waiting on that key
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value for key, fetching it at most once per TTL across all callers."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = self.fetch(key)
+        except Exception as e:
+            # Failures are handed to every waiter but never cached
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
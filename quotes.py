@@ -0,0 +1,34 @@
+import pandas as pd
+import yfinance as yf
+
+QUOTE_FIELDS = {
+    "Close": "current_price",
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Volume": "volume",
+}
+
+
+def _empty_quotes():
+    return pd.DataFrame(columns=list(QUOTE_FIELDS.values()), dtype=float)
+
+
+# Fetch the latest bar for many symbols in one batched request. yf.download keeps its results in
+# module-level state, so only one thread may call this at a time; in the apps that is the PriceRefresher
+def get_quotes(symbols):
+    """Return a DataFrame indexed by symbol with current_price, open, high, low and volume."""
+    symbols = sorted({s for s in symbols if isinstance(s, str) and s})
+    if not symbols:
+        return _empty_quotes()
+
+    # A few days of bars so every symbol has a last valid close even across holidays
+    data = yf.download(symbols, period="5d", group_by="ticker", threads=True, progress=False)
+    if data.empty:
+        return _empty_quotes()
+    if not isinstance(data.columns, pd.MultiIndex):
+        data.columns = pd.MultiIndex.from_product([symbols, data.columns])
+
+    # Last valid bar of every symbol, one row per symbol
+    latest = data.ffill().iloc[-1].unstack().dropna(subset=["Close"])
+    return latest[list(QUOTE_FIELDS)].rename(columns=QUOTE_FIELDS).astype(float)
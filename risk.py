@@ -0,0 +1,156 @@
+import numpy as np
+
+from execution import BUY, TradeError
+
+# Daily returns per symbol used for historical VaR, and the confidence level it is quoted at
+VAR_LOOKBACK = 250
+VAR_CONFIDENCE = 0.95
+
+
+# Raised by RiskEngine.check when an order would breach a limit; a TradeError, so callers already handle it
+class RiskLimitError(TradeError):
+    pass
+
+
+class RiskLimits:
+    def __init__(self, max_position_weight=0.25, max_position_value=None, max_var=0.05, confidence=VAR_CONFIDENCE):
+        self.max_position_weight = max_position_weight  # one symbol's share of equity
+        self.max_position_value = max_position_value  # dollars in one symbol, None for no limit
+        self.max_var = max_var  # one-day historical VaR as a fraction of equity
+        self.confidence = confidence
+
+
+# Last lookback simple returns of a close series, zero-padded at the front when the history is shorter
+def trailing_returns(close, lookback=VAR_LOOKBACK):
+    returns = np.zeros(lookback)
+    if close is None or len(close) < 2:
+        return returns
+    close = np.asarray(close, dtype=float)[-(lookback + 1):]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        recent = np.nan_to_num(close[1:] / close[:-1] - 1)
+    returns[lookback - len(recent):] = recent
+    return returns
+
+
+def historical_var(scenarios, confidence=VAR_CONFIDENCE):
+    """Loss not exceeded on confidence of the historical days; O(lookback) by partial sort."""
+    k = int((1 - confidence) * len(scenarios))
+    return max(0.0, -float(np.partition(scenarios, k)[k]))
+
+
+# Running exposure, concentration and historical VaR of one book. The book's P&L under each of the
+# last lookback days' returns is kept as a scenario vector, so a fill on one symbol moves it by
+# (change in exposure) x (that symbol's returns): O(lookback) per fill or check, whatever the book size.
+class RiskEngine:
+    def __init__(self, cash, limits=None, load_closes=None, lookback=VAR_LOOKBACK):
+        self.cash = cash
+        self.limits = limits or RiskLimits()
+        self.load_closes = load_closes  # symbol -> daily closes (oldest first), or None if unknown
+        self.lookback = lookback
+        self.shares = {}
+        self.prices = {}
+        self.exposure = {}  # symbol -> market value
+        self.gross = 0.0
+        self.scenarios = np.zeros(lookback)
+        self._returns = {}
+
+    @classmethod
+    def from_holdings(cls, cash, holdings, prices, limits=None, load_closes=None, lookback=VAR_LOOKBACK):
+        """Build an engine from {symbol: shares} and {symbol: price}."""
+        engine = cls(cash, limits, load_closes, lookback)
+        for symbol, shares in holdings.items():
+            engine.shares[symbol] = shares
+            engine.mark(symbol, prices[symbol])
+        return engine
+
+    @property
+    def equity(self):
+        return self.cash + self.gross
+
+    def returns(self, symbol):
+        if symbol not in self._returns:
+            closes = self.load_closes(symbol) if self.load_closes else None
+            self._returns[symbol] = trailing_returns(closes, self.lookback)
+        return self._returns[symbol]
+
+    def _set_exposure(self, symbol, value):
+        delta = value - self.exposure.get(symbol, 0.0)
+        self.exposure[symbol] = value
+        self.gross += delta
+        self.scenarios += delta * self.returns(symbol)
+
+    def mark(self, symbol, price):
+        """Revalue a holding at a new price."""
+        self.prices[symbol] = price
+        self._set_exposure(symbol, self.shares.get(symbol, 0) * price)
+
+    def var(self):
+        return historical_var(self.scenarios, self.limits.confidence)
+
+    def check(self, order):
+        """Raise RiskLimitError if the order would breach a limit it also makes worse; returns the post-trade metrics.
+
+        Orders that reduce risk, such as sells out of an over-limit position, always pass.
+        """
+        limits = self.limits
+        held = self.shares.get(order.symbol, 0)
+        current = held * order.price
+        notional = order.shares * order.price
+        if order.side == BUY:
+            value, cash = current + notional, self.cash - notional
+        else:
+            value, cash = max(current - notional, 0.0), self.cash + notional
+        delta = value - self.exposure.get(order.symbol, 0.0)
+        equity_before = self.cash + self.gross + current - self.exposure.get(order.symbol, 0.0)
+        equity = cash + self.gross + delta
+        var_before = self.var()
+        var_after = historical_var(self.scenarios + delta * self.returns(order.symbol), limits.confidence)
+        weight_before = current / equity_before if equity_before > 0 else 0.0
+        weight = value / equity if equity > 0 else 0.0
+
+        breaches = []
+        if limits.max_position_weight is not None and weight > limits.max_position_weight and weight > weight_before:
+            breaches.append(
+                f"{order.symbol} would be {weight:.1%} of equity (limit {limits.max_position_weight:.0%})"
+            )
+        if limits.max_position_value is not None and value > limits.max_position_value and value > current:
+            breaches.append(
+                f"{order.symbol} exposure would be ${value:,.2f} (limit ${limits.max_position_value:,.2f})"
+            )
+        if limits.max_var is not None and equity > 0 and var_after / equity > limits.max_var and var_after > var_before:
+            breaches.append(
+                f"1-day VaR would be ${var_after:,.2f}, {var_after / equity:.1%} of equity (limit {limits.max_var:.0%})"
+            )
+        if breaches:
+            raise RiskLimitError("Order rejected by risk limits: " + "; ".join(breaches) + ".")
+        return {"exposure": value, "weight": weight, "var": var_after, "equity": equity}
+
+    def apply(self, fill):
+        """Fold an executed fill into the running state."""
+        order = fill.order
+        self.cash = fill.cash_after
+        if fill.shares_after:
+            self.shares[order.symbol] = fill.shares_after
+        else:
+            self.shares.pop(order.symbol, None)
+        self.mark(order.symbol, order.price)
+        if not fill.shares_after:
+            self.exposure.pop(order.symbol, None)
+            self.prices.pop(order.symbol, None)
+
+    def holdings(self):
+        return dict(self.shares)
+
+    def metrics(self):
+        """Book-level figures for display; the largest weight scans every position."""
+        equity = self.equity
+        var = self.var()
+        largest = max(self.exposure.items(), key=lambda item: item[1], default=(None, 0.0))
+        return {
+            "equity": equity,
+            "gross_exposure": self.gross,
+            "var": var,
+            "var_pct": var / equity if equity > 0 else 0.0,
+            "largest_position": largest[0],
+            "largest_weight": largest[1] / equity if equity > 0 else 0.0,
+        }
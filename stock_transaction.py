@@ -1,8 +1,18 @@
 import streamlit as st
 import pandas as pd
-import datetime
-import os
 import base64
+from ledger import fill_to_row, has_rows
+from execution import BUY, SELL, Order, TradeError
+from fees import STOCK_TRANSACTION_FEE
+from bulk_import import BulkImportError, import_transactions
+from analytics import COST_METHODS
+from accounts import (
+    DEFAULT_ACCOUNT, AccountRegistry, LedgerAccount, account_path, is_valid_account_id, migrate_legacy
+)
+from instrumentation import begin_page, end_page, rerun_page, stop_page, timed, timer, count
+
+# Optional per-run timing panel in the sidebar
+begin_page("stock_transaction")
 
 # Function to load the image and convert it to base64
 def get_base64_of_bin_file(bin_file):
@@ -14,7 +24,8 @@ def get_base64_of_bin_file(bin_file):
 qr_code_path = "qrcode.png"  # Ensure the image is in your app directory
 
 # Convert image to base64
-qr_code_base64 = get_base64_of_bin_file(qr_code_path)
+with timer("read_qr_code"):
+    qr_code_base64 = get_base64_of_bin_file(qr_code_path)
 
 # Custom CSS to position the QR code close to the top-right corner under the "Deploy" area
 st.markdown(
@@ -34,172 +45,164 @@ st.markdown(
 )
 
 
-# CSV filename constant
+# Ledger file name inside each account's directory
 CSV_FILENAME = "transaction_history.csv"
-TRANSACTION_FEE = 10
+
+# Flat fee per trade from the shared schedule; also the default fee for imported rows without one
+TRANSACTION_FEE = STOCK_TRANSACTION_FEE.amount
+
+# Number of most recent transactions shown in the history table
+HISTORY_DISPLAY_ROWS = 1000
+
+# Account this session works on; every account keeps its own ledger under accounts/<id>/
+account_id = st.sidebar.text_input("Account", value=DEFAULT_ACCOUNT, key="account_id").strip()
+if not is_valid_account_id(account_id):
+    st.sidebar.error("Account names may only contain letters, digits, '-' and '_'.")
+    stop_page()
+
+# Ledger path for an account; the default account takes over the ledger from before accounts existed
+def ledger_path(account_id):
+    path = account_path(account_id, CSV_FILENAME)
+    if account_id == DEFAULT_ACCOUNT:
+        migrate_legacy(path, CSV_FILENAME)
+    return path
+
+# Function to load an account's transaction history, cash and holdings
+@timed("load_transaction_history")
+def load_account(account_id):
+    account = LedgerAccount(ledger_path(account_id), STOCK_TRANSACTION_FEE, HISTORY_DISPLAY_ROWS).load()
+    count("ledger_rows", account.ledger.row_count)
+    return account
+
+# Accounts are loaded on first use and shared by their sessions; idle ones are dropped from memory
+@st.cache_resource
+def get_accounts():
+    return AccountRegistry(load_account)
 
 # Function to check if transaction history exists and has data
-def has_transaction_history():
-    if os.path.exists(CSV_FILENAME):
-        df = pd.read_csv(CSV_FILENAME)
-        return not df.empty
-    return False
-
-# Function to load transaction history and initialize state
-def load_transaction_history():
-    if os.path.exists(CSV_FILENAME):
-        df = pd.read_csv(CSV_FILENAME)
-        
-        # Initialize transactions from CSV
-        st.session_state.transactions = df.to_dict('records')
-        
-        # Initialize available cash from the last transaction
-        if not df.empty:
-            st.session_state.available_cash = float(df['Available Cash'].iloc[-1])
-        else:
-            # If CSV exists but is empty, use default or user-set initial fund
-            st.session_state.available_cash = st.session_state.get('initial_fund', 10000)
-            
-        # Initialize shares by symbol from the latest state for each symbol
-        shares_dict = {}
-        for symbol in df['Stock Symbol'].unique():
-            symbol_df = df[df['Stock Symbol'] == symbol]
-            if not symbol_df.empty:
-                shares = int(symbol_df.iloc[-1]['Shares Owned'])
-                if shares > 0:  # Only add if there are shares owned
-                    shares_dict[symbol] = shares
-        st.session_state.shares_by_symbol = shares_dict
-    else:
-        # Initialize with default values if no CSV exists
-        st.session_state.transactions = []
-        st.session_state.available_cash = st.session_state.get('initial_fund', 10000)
-        st.session_state.shares_by_symbol = {}
+@timed("has_transaction_history")
+def has_transaction_history(account):
+    return has_rows(account.path)
+
+account = get_accounts().get(account_id)
 
-# Initialize session state
-if 'initialized' not in st.session_state:
-    st.session_state.initialized = False
+# Accounts held in memory, loads and evictions, used to size the account registry
+with st.sidebar.expander("Account registry stats"):
+    st.json(get_accounts().stats())
 
 st.title("Stock Transaction Tracker")
 
 # Check if transaction history exists
-has_history = has_transaction_history()
-
-# Initial Fund Setup - only show if no transaction history exists
-if not has_history:
-    if not st.session_state.initialized:
-        st.header("Initial Fund Setup")
-        default_fund = 10000
-        if 'initial_fund' not in st.session_state:
-            st.session_state.initial_fund = default_fund
-        
-        new_initial_fund = st.number_input(
-            "Set your initial fund amount ($)", 
-            min_value=100.0, 
-            value=float(st.session_state.initial_fund),
-            step=100.0,
-            format="%.2f"
-        )
-        
-        if st.button("Set Initial Fund"):
-            st.session_state.initial_fund = new_initial_fund
-            st.session_state.initialized = True
-            load_transaction_history()
-            st.success(f"Initial fund set to ${new_initial_fund:,.2f}")
-            st.rerun()
-
-# Load transaction history if not already initialized
-if has_history and not st.session_state.initialized:
-    load_transaction_history()
-    st.session_state.initialized = True
+has_history = has_transaction_history(account)
+
+# Initial Fund Setup - only show until the account has cash, i.e. before its first transaction
+if not has_history and account.book.cash is None:
+    st.header("Initial Fund Setup")
+    default_fund = 10000
+    if 'initial_fund' not in st.session_state:
+        st.session_state.initial_fund = default_fund
+
+    new_initial_fund = st.number_input(
+        "Set your initial fund amount ($)", 
+        min_value=100.0, 
+        value=float(st.session_state.initial_fund),
+        step=100.0,
+        format="%.2f"
+    )
+
+    if st.button("Set Initial Fund"):
+        st.session_state.initial_fund = new_initial_fund
+        account.load(initial_cash=new_initial_fund)
+        st.success(f"Initial fund set to ${new_initial_fund:,.2f}")
+        rerun_page()
 
 # Main app interface
-if st.session_state.initialized or has_history:
+if account.book.cash is not None:
     # Display current portfolio summary
+    book = account.book
     st.header("Current Portfolio")
-    st.write(f"Available Cash: ${st.session_state.available_cash:.2f}")
-    if st.session_state.shares_by_symbol:
+    st.write(f"Available Cash: ${book.cash:.2f}")
+    if book.positions:
         st.write("Shares Owned:")
-        for symbol, shares in st.session_state.shares_by_symbol.items():
+        for symbol, shares in book.holdings().items():
             st.write(f"{symbol}: {shares} shares")
     else:
         st.write("No shares currently owned")
 
+    # Realized and unrealized P&L, cost basis and time-weighted return
+    st.header("Performance")
+    cost_method = st.radio("Cost Basis Method", COST_METHODS, horizontal=True)
+    with timer("analytics"):
+        analytics = account.analytics(cost_method)
+    tracker = analytics.tracker
+    if analytics.skipped:
+        st.warning(
+            f"{len(analytics.skipped)} ledger rows sell more shares than were held and are left out of these figures. "
+            f"Latest: {analytics.skipped[-1]}"
+        )
+    if tracker is None:
+        st.write("No transactions recorded yet.")
+    else:
+        totals = tracker.totals()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Realized P&L", f"${totals['realized']:,.2f}")
+        col2.metric("Unrealized P&L", f"${totals['unrealized']:,.2f}")
+        col3.metric("Total Fees", f"${totals['fees']:,.2f}")
+        col4.metric("Total Return", f"{totals['total_return']:.2%}")
+        st.dataframe(tracker.summary(), hide_index=True)
+        st.caption("Open positions are valued at their last traded price.")
+
     # Input fields for transaction details
     st.header("Add New Transaction")
-    transaction_type = st.selectbox("Transaction Type", ["Buy", "Sell"])
+    transaction_type = st.selectbox("Transaction Type", [BUY, SELL])
     stock_symbol = st.text_input("Stock Symbol", value="AAPL")
     shares = st.number_input("Number of Shares", min_value=1, value=10)
     price_per_share = st.number_input("Price per Share", min_value=0.01, value=150.00)
 
-    # Calculate total cost/revenue of transaction
-    total_cost = shares * price_per_share
-    net_amount = total_cost + TRANSACTION_FEE if transaction_type == "Buy" else total_cost - TRANSACTION_FEE
-
     # Transaction form
     if st.button("Record Transaction"):
-        if transaction_type == "Buy":
-            if st.session_state.available_cash < net_amount:
-                st.error("Insufficient funds for this transaction.")
+        fill = None
+        # Other sessions on this account wait, so the check and the append cannot interleave
+        with account.lock:
+            try:
+                # Check funds or holdings against the book as of now, under the lock; another session's
+                # trade or import may have rebuilt it since this page read it
+                fill = account.book.execute_one(Order(transaction_type, stock_symbol, shares, price_per_share))
+            except TradeError as e:
+                st.error(str(e))
             else:
-                # Update available cash and shares for the specific stock symbol
-                st.session_state.available_cash -= net_amount
-                if stock_symbol in st.session_state.shares_by_symbol:
-                    st.session_state.shares_by_symbol[stock_symbol] += shares
-                else:
-                    st.session_state.shares_by_symbol[stock_symbol] = shares
-                # Record the transaction
-                transaction = {
-                    "Date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "Type": transaction_type,
-                    "Stock Symbol": stock_symbol,
-                    "Shares": shares,
-                    "Price per Share": price_per_share,
-                    "Transaction Fee": TRANSACTION_FEE,
-                    "Total Amount": net_amount,
-                    "Available Cash": st.session_state.available_cash,
-                    "Shares Owned": st.session_state.shares_by_symbol[stock_symbol]
-                }
-                st.session_state.transactions.append(transaction)
-                
-                # Update CSV file
-                df = pd.DataFrame([transaction])
-                df.to_csv(CSV_FILENAME, mode='a', header=not os.path.exists(CSV_FILENAME), index=False)
-                st.success("Transaction recorded successfully!")
-                st.rerun()
-                
-        elif transaction_type == "Sell":
-            if stock_symbol not in st.session_state.shares_by_symbol or st.session_state.shares_by_symbol[stock_symbol] < shares:
-                st.error(f"You do not have enough shares of {stock_symbol} to sell. You have {st.session_state.shares_by_symbol.get(stock_symbol, 0)} shares.")
-            else:
-                # Update available cash and shares for the specific stock symbol
-                st.session_state.available_cash += net_amount
-                st.session_state.shares_by_symbol[stock_symbol] -= shares
-                if st.session_state.shares_by_symbol[stock_symbol] == 0:
-                    del st.session_state.shares_by_symbol[stock_symbol]  # Remove stock symbol if shares are 0
-                # Record the transaction
-                transaction = {
-                    "Date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "Type": transaction_type,
-                    "Stock Symbol": stock_symbol,
-                    "Shares": shares,
-                    "Price per Share": price_per_share,
-                    "Transaction Fee": TRANSACTION_FEE,
-                    "Total Amount": net_amount,
-                    "Available Cash": st.session_state.available_cash,
-                    "Shares Owned": st.session_state.shares_by_symbol.get(stock_symbol, 0)
-                }
-                st.session_state.transactions.append(transaction)
-                
-                # Update CSV file
-                df = pd.DataFrame([transaction])
-                df.to_csv(CSV_FILENAME, mode='a', header=not os.path.exists(CSV_FILENAME), index=False)
-                st.success("Transaction recorded successfully!")
-                st.rerun()
+                # Record the transaction and append it to the ledger file
+                with timer("append_ledger"):
+                    account.record(fill_to_row(fill))
+        if fill is not None:
+            st.success("Transaction recorded successfully!")
+            rerun_page()
+
+    # Bulk import of historical trades from a CSV or broker statement
+    st.header("Import Transactions")
+    uploaded_file = st.file_uploader(
+        "Upload a CSV with Date, Type, Stock Symbol, Shares and Price per Share columns", type="csv"
+    )
+    if uploaded_file is not None and st.button("Import Transactions"):
+        try:
+            with account.lock, timer("import_transactions"):
+                imported = import_transactions(uploaded_file, account.ledger, account.book.cash, TRANSACTION_FEE)
+                # Rebuild the book and recent history from the ledger's running state
+                account.refresh()
+        except BulkImportError as e:
+            st.error(f"Import failed, nothing was recorded. {e}")
+        else:
+            st.success(f"Imported {imported} transactions.")
+            rerun_page()
 
     # Display transaction history
     st.header("Transaction History")
-    if st.session_state.transactions:
-        df = pd.DataFrame(st.session_state.transactions)
-        st.dataframe(df)
+    if account.transactions:
+        df = pd.DataFrame(account.transactions)
+        st.caption(f"Showing the latest {len(df)} of {account.ledger.row_count} transactions")
+        with timer("render_history"):
+            st.dataframe(df)
     else:
-        st.write("No transactions recorded yet.")
\ No newline at end of file
+        st.write("No transactions recorded yet.")
+
+end_page()
\ No newline at end of file
@@ -1,49 +1,195 @@
+import math
 import streamlit as st
-import yfinance as yf
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
+from price_store import PriceStore, INTRADAY_MAX_DAYS
+from backtest import close_matrix
+from comparison import correlation, covariance, log_returns, normalized, rolling_correlation
+from decimation import decimate, resample_ohlc, resample_rule
+from symbols import SymbolIndex
+from indicators import IndicatorStore, DEFAULT_INDICATORS
+from instrumentation import begin_page, end_page, stop_page, timer, count
 
-# Define a dictionary mapping stock names to their ticker symbols
-stocks = {
-    "Google": "GOOGL",
-    "Meta": "META",
-    "Apple": "AAPL",
-    "Microsoft": "MSFT",
-    "Nvidia": "NVDA"
+# Tickers offered before the user searches the symbol master
+DEFAULT_SYMBOLS = ["GOOGL", "META", "AAPL", "MSFT", "NVDA"]
+
+# How far back to load for each bar interval
+INTERVAL_LOOKBACK_DAYS = {
+    "1d": 5 * 365,  # Assuming 365 days per year
+    **{interval: days - 1 for interval, days in INTRADAY_MAX_DAYS.items()},
 }
 
 # Page title and description
 st.title('Interactive Stock Chart App')
 st.write('Select a stock to view its chart:')
 
+# Optional per-run timing panel in the sidebar
+begin_page('stocks')
+
+# Symbol master loaded once per server process
+@st.cache_resource
+def get_symbol_index():
+    return SymbolIndex.load()
+
+with timer('load_symbols'):
+    symbol_index = get_symbol_index()
+
+# Shared on-disk price store; only the bars missing locally are fetched from Yahoo Finance
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+# Indicators stored next to the price cache and extended only by the bars added since the last run
+@st.cache_resource
+def get_indicator_store():
+    return IndicatorStore(get_price_store())
+
+# Compare mode: many tickers at once, loaded in parallel and analysed as one close matrix
+view = st.radio('View', ['Single Stock', 'Compare'], horizontal=True)
+if view == 'Compare':
+    import plotly.graph_objs as go
+
+    compare_symbols = st.multiselect(
+        'Symbols to compare', symbol_index.symbols, default=DEFAULT_SYMBOLS,
+        format_func=lambda s: f'{symbol_index.name(s)} ({s})'
+    )
+    st.sidebar.header('Comparison Settings')
+    years = st.sidebar.slider('Years of History', min_value=1, max_value=5, value=5)
+    window = st.sidebar.slider('Correlation Window (days)', min_value=20, max_value=250, value=60, step=10)
+    if len(compare_symbols) < 2:
+        st.info('Select at least two symbols to compare.')
+        stop_page()
+
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=years * 365)
+    with timer('fetch_histories'):
+        frames = get_price_store().history_many(compare_symbols, start_date, end_date)
+    count('symbols_loaded', len(frames))
+    missing = [symbol for symbol, data in frames.items() if data.empty]
+    if missing:
+        st.warning(f'No price history for: {", ".join(missing)}')
+
+    with timer('align'):
+        dates, symbols, close = close_matrix(frames, np.float32)
+    if len(symbols) < 2:
+        stop_page()
+    with timer('correlation'):
+        returns = log_returns(close)
+        recent = returns[-window:]
+        corr = correlation(recent)
+        cov = covariance(recent)
+        rolling = rolling_correlation(returns, 0, window)
+
+    with timer('render_comparison'):
+        fig = go.Figure()
+        performance = normalized(close)
+        for i, symbol in enumerate(symbols):
+            fig.add_trace(go.Scatter(x=dates, y=performance[:, i], mode='lines', name=symbol))
+        fig.update_layout(title='Performance (rebased to 100)', xaxis_title='Date', yaxis_title='Value')
+        st.plotly_chart(fig, use_container_width=True)
+
+        heatmap = go.Figure(go.Heatmap(z=corr, x=symbols, y=symbols, zmin=-1, zmax=1, colorscale='RdBu'))
+        heatmap.update_layout(title=f'Correlation of daily log returns, last {window} days', yaxis_autorange='reversed',
+                              height=max(450, 12 * len(symbols)))
+        st.plotly_chart(heatmap, use_container_width=True)
+
+        fig = go.Figure()
+        for i, symbol in enumerate(symbols[1:], start=1):
+            fig.add_trace(go.Scatter(x=dates[1:], y=rolling[:, i], mode='lines', name=symbol))
+        fig.update_layout(title=f'{window}-day rolling correlation with {symbols[0]}', xaxis_title='Date',
+                          yaxis_title='Correlation', yaxis_range=[-1, 1])
+        st.plotly_chart(fig, use_container_width=True)
+
+        with st.expander('Annualized covariance matrix'):
+            st.dataframe(pd.DataFrame(cov, index=symbols, columns=symbols))
+
+    stop_page()
+
+# Search box narrows the dropdown to matching tickers
+query = st.text_input('Search by symbol or company name', '')
+with timer('search_symbols'):
+    options = symbol_index.search(query, limit=50) if query else DEFAULT_SYMBOLS
+if not options:
+    st.warning(f'No symbols match "{query}".')
+    stop_page()
+
 # Dropdown menu to select stock
-selected_stock = st.selectbox('Select Stock', list(stocks.keys()))
+ticker_symbol = st.selectbox('Select Stock', options, format_func=lambda s: f'{symbol_index.name(s)} ({s})')
+selected_stock = symbol_index.name(ticker_symbol)
 
 # Display the selected stock's name and symbol
-st.write(f'Stock selected: {selected_stock} ({stocks[selected_stock]})')
+st.write(f'Stock selected: {selected_stock} ({ticker_symbol})')
+
+# Sidebar controls for bar interval and how much detail is sent to the browser
+st.sidebar.header('Chart Settings')
+interval = st.sidebar.selectbox('Bar Interval', list(INTERVAL_LOOKBACK_DAYS.keys()))
+max_points = st.sidebar.slider('Max Chart Points', min_value=200, max_value=5000, value=1500, step=100)
+chart_mode = st.sidebar.radio('Chart Type', ['Line (LTTB)', 'Candlestick (resampled)'])
+rows_per_page = st.sidebar.selectbox('Table Rows per Page', [25, 50, 100, 250], index=1)
+selected_indicators = st.sidebar.multiselect('Indicators', [indicator.name for indicator in DEFAULT_INDICATORS])
 
-# Calculate date ranges for the last 5 years
+# Calculate date ranges: 5 years of daily bars, or as much intraday history as Yahoo serves
 end_date = datetime.now()
-start_date = end_date - timedelta(days=5*365)  # Assuming 365 days per year
+start_date = end_date - timedelta(days=INTERVAL_LOOKBACK_DAYS[interval])
 
-# Fetch historical data from Yahoo Finance
-ticker_symbol = stocks[selected_stock]
-stock_data = yf.download(ticker_symbol, start=start_date, end=end_date)
+# Fetch historical data, with the selected indicator columns
+with timer('fetch_history'):
+    stock_data = get_indicator_store().history(ticker_symbol, start_date, end_date, selected_indicators, interval)
+count('bars_loaded', len(stock_data))
 
-# Display the data
-st.write(stock_data)
+# Display the data one page at a time instead of the whole history
+total_pages = max(1, math.ceil(len(stock_data) / rows_per_page))
+page = st.number_input('Page', min_value=1, max_value=total_pages, value=total_pages, step=1)
+with timer('render_table'):
+    st.write(stock_data.iloc[(page - 1) * rows_per_page:page * rows_per_page])
+st.caption(f'Page {page} of {total_pages} ({len(stock_data)} bars)')
 
-# Plot the data with customized x-axis date format
+# Plot the data with customized x-axis date format, capped at max_points
 import plotly.graph_objs as go
+from plotly.subplots import make_subplots
 
-fig = go.Figure()
-fig.add_trace(go.Scatter(x=stock_data.index, y=stock_data['Close'], mode='lines', name='Close'))
+# Moving averages share the price axis; oscillators such as RSI each get a panel below it
+overlays = [name for name in selected_indicators if get_indicator_store().indicators[name].overlay]
+panels = [name for name in selected_indicators if name not in overlays]
+fig = make_subplots(rows=1 + len(panels), cols=1, shared_xaxes=True, vertical_spacing=0.03,
+                    row_heights=[3] + [1] * len(panels))
+if chart_mode == 'Line (LTTB)':
+    with timer('decimate'):
+        chart_data = decimate(stock_data, 'Close', max_points)
+    fig.add_trace(go.Scatter(x=chart_data.index, y=chart_data['Close'], mode='lines', name='Close'), row=1, col=1)
+else:
+    chart_data = stock_data
+    if len(stock_data) > max_points:
+        with timer('resample'):
+            chart_data = resample_ohlc(stock_data, resample_rule(stock_data.index, max_points))
+    fig.add_trace(go.Candlestick(
+        x=chart_data.index,
+        open=chart_data['Open'],
+        high=chart_data['High'],
+        low=chart_data['Low'],
+        close=chart_data['Close'],
+        name='OHLC'
+    ), row=1, col=1)
+    fig.update_layout(xaxis_rangeslider_visible=False)
+
+for name in overlays:
+    fig.add_trace(go.Scatter(x=chart_data.index, y=chart_data[name], mode='lines', name=name), row=1, col=1)
+for row, name in enumerate(panels, start=2):
+    fig.add_trace(go.Scatter(x=chart_data.index, y=chart_data[name], mode='lines', name=name), row=row, col=1)
+    fig.update_yaxes(title_text=name, row=row, col=1)
 
 fig.update_layout(
     title=f'{selected_stock} Stock Price',
-    xaxis_title='Date',
     yaxis_title='Price',
-    xaxis_tickformat='%b %y'  # Format x-axis ticks as Day Month Year (e.g., 01 Jan 20)
+    height=450 + 150 * len(panels),
 )
+fig.update_xaxes(tickformat='%b %y' if interval == '1d' else '%d %b %H:%M')  # Month Year for daily bars, e.g. Jan 20
+fig.update_xaxes(title_text='Date', row=1 + len(panels), col=1)
+
+with timer('render_chart'):
+    st.plotly_chart(fig)
+count('points_plotted', len(chart_data))
+st.caption(f'{len(chart_data)} of {len(stock_data)} bars plotted')
 
-st.plotly_chart(fig)
+end_page()
@@ -0,0 +1,118 @@
+import bisect
+import csv
+import difflib
+import os
+import re
+import threading
+import time
+
+# Symbol master: one row per ticker with Symbol, Name, Exchange, Currency.
+# The bundled file is a small seed; `python build_symbols.py` writes the full US exchange listing.
+SYMBOLS_FILE = os.environ.get("SYMBOLS_FILE", "symbols.csv")
+
+# Symbols missing from the master are checked with the data provider once; a symbol it did not
+# know is asked about again only after this long
+UNKNOWN_SYMBOL_TTL = 60 * 60  # seconds
+
+# What a ticker can look like (e.g. BRK-B, ^GSPC, EURUSD=X); anything else is not worth a provider call
+TICKER_PATTERN = re.compile(r"[A-Z0-9.\-^=]{1,12}")
+
+
+# In-memory symbol index: O(1) validation, prefix search by bisection and fuzzy name search
+class SymbolIndex:
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda row: row["Symbol"])
+        self.symbols = [row["Symbol"] for row in rows]
+        self.names = [row.get("Name") or row["Symbol"] for row in rows]
+        self.exchanges = [row.get("Exchange", "") for row in rows]
+        self.currencies = [row.get("Currency", "") for row in rows]
+        self._position = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._lower_names = [name.lower() for name in self.names]
+        self._found = {}  # symbols outside the master that the provider knows -> name
+        self._not_found = {}  # symbols the provider did not know -> time of the check
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=SYMBOLS_FILE):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [row for row in csv.DictReader(f) if row.get("Symbol")]
+        for row in rows:
+            row["Symbol"] = row["Symbol"].strip().upper()
+        return cls(rows)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._position
+
+    def is_valid(self, symbol):
+        return symbol in self._position
+
+    def check(self, symbol, lookup):
+        """is_valid, falling back to lookup(symbol) for symbols missing from the master.
+
+        Only for tickers the user typed in full; name and fuzzy searches stay within the master.
+
+        lookup returns the symbol's name, or None if the provider does not know it; its answer is
+        remembered, so each symbol costs at most one provider call (per UNKNOWN_SYMBOL_TTL if unknown).
+        """
+        if symbol in self._position or symbol in self._found:
+            return True
+        if not TICKER_PATTERN.fullmatch(symbol):
+            return False
+        with self._lock:
+            checked_at = self._not_found.get(symbol)
+        if checked_at is not None and time.monotonic() - checked_at < UNKNOWN_SYMBOL_TTL:
+            return False
+        name = lookup(symbol)
+        with self._lock:
+            if name is None:
+                self._not_found[symbol] = time.monotonic()
+            else:
+                self._found[symbol] = name
+                self._not_found.pop(symbol, None)
+        return name is not None
+
+    def info(self, symbol):
+        i = self._position.get(symbol)
+        if i is None:
+            return None
+        return {
+            "symbol": symbol,
+            "name": self.names[i],
+            "exchange": self.exchanges[i],
+            "currency": self.currencies[i],
+        }
+
+    def name(self, symbol):
+        i = self._position.get(symbol)
+        return self.names[i] if i is not None else self._found.get(symbol, symbol)
+
+    def prefix(self, query, limit=20):
+        """Symbols starting with query, in sorted order."""
+        query = query.upper()
+        start = bisect.bisect_left(self.symbols, query)
+        end = bisect.bisect_left(self.symbols, query + "￿", lo=start)
+        return self.symbols[start:min(end, start + limit)]
+
+    def search(self, query, limit=20):
+        """Symbol prefix matches first, then names containing query, then close fuzzy matches."""
+        query = query.strip()
+        if not query:
+            return []
+        results = self.prefix(query, limit)
+        seen = set(results)
+        lower = query.lower()
+        for i, name in enumerate(self._lower_names):
+            if len(results) >= limit:
+                return results
+            if lower in name and self.symbols[i] not in seen:
+                results.append(self.symbols[i])
+                seen.add(self.symbols[i])
+        if len(results) < limit:
+            for symbol in difflib.get_close_matches(query.upper(), self.symbols, n=limit - len(results), cutoff=0.6):
+                if symbol not in seen:
+                    results.append(symbol)
+                    seen.add(symbol)
+        return results
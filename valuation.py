@@ -0,0 +1,26 @@
+import numpy as np
+
+
+# Add market value, cost basis, unrealized P&L and weight columns to a portfolio in one vectorized pass
+def value_portfolio(portfolio, prices):
+    """prices is a Series of latest price by symbol; symbols without a price are valued at 0."""
+    shares = portfolio["Shares"].to_numpy(dtype=float)
+    purchase_price = portfolio["Purchase Price"].to_numpy(dtype=float)
+    current_price = portfolio["Symbol"].map(prices).to_numpy(dtype=float)
+    has_price = ~np.isnan(current_price)
+
+    market_value = np.where(has_price, shares * current_price, 0.0)
+    cost_basis = shares * purchase_price
+    unrealized_pnl = np.where(has_price, market_value - cost_basis, np.nan)
+    total_value = market_value.sum()
+    weight = market_value / total_value * 100 if total_value else np.zeros_like(market_value)
+
+    return portfolio.assign(
+        **{
+            "Current Price": current_price,
+            "Current Value": market_value,
+            "Cost Basis": cost_basis,
+            "Unrealized P&L": unrealized_pnl,
+            "Weight (%)": weight,
+        }
+    )